@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+# Activity is stored one document per student, course and month:
+#   {studentId, courseId, month, activityLogs: [{date, durationMinutes}], legacyLogs: [...],
+#    appliedBatches: [<recent write-behind batch ids>]}
+# course_activity_logs keeps the enrollment (title, origin, joinLink, lastAccessed as of
+# joining); each bucket carries the lastAccessed of its latest daily write.
+# legacyLogs holds entries migrated from the old unbounded activityLogs array; they are
+# only read once that array has been removed from the enrollment document.
+BUCKETS_COLLECTION = "course_activity_buckets"
+
+
+def start_of_day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+# Write-behind batches applied to a bucket, newest last; enough to recognise a retried batch
+APPLIED_BATCHES_KEPT = 16
+
+
+def daily_activity_update(day, duration, accessed_on, batch_id=None):
+    # Update pipeline that adds `duration` to the activityLogs entry for `day`, or appends
+    # that entry when it does not exist yet. The check and the write happen inside one
+    # document update, so concurrent writers can never push two entries for the same day.
+    # With a batch_id the update is a no-op on buckets that already recorded that batch,
+    # so a retried flush never adds the same minutes twice.
+    logs = {"$ifNull": ["$activityLogs", []]}
+    updated_logs = {"$cond": [
+        {"$in": [day, {"$map": {"input": logs, "as": "log", "in": "$$log.date"}}]},
+        {"$map": {
+            "input": logs,
+            "as": "log",
+            "in": {"$cond": [
+                {"$eq": ["$$log.date", day]},
+                {"$mergeObjects": ["$$log", {"durationMinutes": {"$add": [{"$ifNull": ["$$log.durationMinutes", 0]}, duration]}}]},
+                "$$log"
+            ]}
+        }},
+        {"$concatArrays": [logs, [{"date": day, "durationMinutes": duration}]]}
+    ]}
+    if batch_id is None:
+        return [{"$set": {"activityLogs": updated_logs, "lastAccessed": accessed_on}}]
+
+    batches = {"$ifNull": ["$appliedBatches", []]}
+    applied = {"$in": [batch_id, batches]}
+    return [{"$set": {
+        "activityLogs": {"$cond": [applied, logs, updated_logs]},
+        "lastAccessed": {"$cond": [applied, "$lastAccessed", accessed_on]},
+        "appliedBatches": {"$cond": [
+            applied, batches, {"$slice": [{"$concatArrays": [batches, [batch_id]]}, -APPLIED_BATCHES_KEPT]}
+        ]}
+    }}]
+
+
+def bucket_filter(student_obj_id, course_id, day):
+    return {"studentId": student_obj_id, "courseId": course_id, "month": month_start(day)}
+
+
+def record_daily_activity(db, student_obj_id, course_id, duration, now=None):
+    # Atomic per-day accumulation inside this month's bucket. The bucket also carries
+    # lastAccessed, so the enrollment document is not written. Returns the day written to.
+    now = now or datetime.utcnow()
+    day = start_of_day(now)
+    db[BUCKETS_COLLECTION].update_one(
+        bucket_filter(student_obj_id, course_id, day),
+        daily_activity_update(day, duration, now),
+        upsert=True
+    )
+    return day
+
+
+def is_enrolled(db, student_obj_id, course_id):
+    return db.course_activity_logs.find_one({"studentId": student_obj_id, "courseId": course_id}, {"_id": 1}) is not None
+
+
+def insert_initial_logs(db, student_obj_id, course_id, logs):
+    # Entries that exist from the start (e.g. the registration placeholder)
+    by_month = defaultdict(list)
+    for log in logs:
+        by_month[month_start(log["date"])].append(log)
+    for month, month_logs in by_month.items():
+        db[BUCKETS_COLLECTION].update_one(
+            {"studentId": student_obj_id, "courseId": course_id, "month": month},
+            {"$push": {"activityLogs": {"$each": month_logs}}},
+            upsert=True
+        )
+
+
+def _merge_logs(base_logs, new_logs):
+    # Same-day entries add up, exactly like incrementing the matching array element did
+    logs = [dict(log) for log in base_logs]
+    index = {}
+    for position, log in enumerate(logs):
+        index.setdefault(log.get("date"), position)
+    for entry in new_logs:
+        position = index.get(entry.get("date"))
+        if position is None:
+            index[entry.get("date")] = len(logs)
+            logs.append(dict(entry))
+        else:
+            logs[position]["durationMinutes"] = logs[position].get("durationMinutes", 0) + entry.get("durationMinutes", 0)
+    return logs
+
+
+def _in_range(log, since, until):
+    date = log.get("date")
+    if not isinstance(date, datetime):
+        return since is None and until is None
+    return (since is None or date >= since) and (until is None or date < until)
+
+
+def load_course_activities(db, student_obj_id, since=None, until=None, enrollment_filter=None):
+    # Enrollment documents with `activityLogs` assembled from the monthly buckets, in the
+    # same shape the array-based documents had. Only buckets in [since, until) are read.
+    query = {"studentId": student_obj_id}
+    query.update(enrollment_filter or {})
+    enrollments = list(db.course_activity_logs.find(query))
+    if not enrollments:
+        return enrollments
+
+    bucket_query = {"studentId": student_obj_id}
+    if enrollment_filter and "courseId" in enrollment_filter:
+        bucket_query["courseId"] = enrollment_filter["courseId"]
+    if since is not None or until is not None:
+        bucket_query["month"] = {}
+        if since is not None:
+            bucket_query["month"]["$gte"] = month_start(since)
+        if until is not None:
+            bucket_query["month"]["$lt"] = until
+
+    buckets = defaultdict(list)
+    for bucket in db[BUCKETS_COLLECTION].find(bucket_query).sort("month", ASCENDING):
+        buckets[bucket["courseId"]].append(bucket)
+
+    for enrollment in enrollments:
+        course_buckets = buckets.get(enrollment.get("courseId"), [])
+        # Daily writes stamp lastAccessed on the bucket rather than the enrollment
+        accessed = [bucket["lastAccessed"] for bucket in course_buckets if bucket.get("lastAccessed")]
+        if enrollment.get("lastAccessed"):
+            accessed.append(enrollment["lastAccessed"])
+        if accessed:
+            enrollment["lastAccessed"] = max(accessed)
+        if "activityLogs" in enrollment:
+            # Not migrated yet: the array is the history, buckets only hold newer writes
+            new_logs = [log for bucket in course_buckets for log in bucket.get("activityLogs", [])]
+            logs = _merge_logs(enrollment["activityLogs"], new_logs)
+        else:
+            logs = []
+            for bucket in course_buckets:
+                logs.extend(_merge_logs(bucket.get("legacyLogs", []), bucket.get("activityLogs", [])))
+
+        if since is not None or until is not None:
+            logs = [log for log in logs if _in_range(log, since, until)]
+        enrollment["activityLogs"] = logs
+
+    return enrollments
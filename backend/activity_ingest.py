@@ -0,0 +1,199 @@
+import atexit
+import threading
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from activity import BUCKETS_COLLECTION, bucket_filter, daily_activity_update, start_of_day
+from performance import rebuild_performance_summary, record_activity_bulk
+
+DEFAULT_FLUSH_SECONDS = 1.0
+DEFAULT_MAX_BUFFERED = 5000
+
+
+def parse_events(raw_events, now):
+    # Validate each {studentId, courseId, durationMinutes, date} event with the same rules as
+    # PUT /api/activity/<student_id>/<course_id>. Returns (valid events, per-event statuses).
+    events = []
+    statuses = []
+    for index, raw in enumerate(raw_events):
+        status = {"index": index, "status": "ok"}
+        statuses.append(status)
+        try:
+            student_obj_id = ObjectId(raw["studentId"])
+            course_id = str(raw["courseId"])
+            duration = int(raw.get("durationMinutes", 0))
+            if duration <= 0:
+                raise ValueError("Duration must be positive")
+            date = datetime.fromisoformat(raw["date"]) if raw.get("date") else now
+            if date.tzinfo is not None:
+                date = date.astimezone(timezone.utc).replace(tzinfo=None)  # Stored dates are naive UTC
+        except KeyError as e:
+            status.update(status="error", error=f"Missing field: {e.args[0]}")
+            continue
+        except Exception as e:
+            status.update(status="error", error=str(e))
+            continue
+        events.append((index, student_obj_id, course_id, start_of_day(date), duration))
+    return events, statuses
+
+
+def merge_events(events):
+    # Duplicates of (student, course, day) collapse into one write with the summed minutes
+    merged = {}
+    for index, student_obj_id, course_id, day, duration in events:
+        key = (student_obj_id, course_id, day)
+        entry = merged.setdefault(key, {"duration": 0, "indexes": []})
+        entry["duration"] += duration
+        entry["indexes"].append(index)
+    return merged
+
+
+def apply_events(db, events, statuses, now=None, batch_id=None, retry=False):
+    # With a batch_id the bucket writes are safe to repeat. A retried batch cannot tell
+    # whether its summary $inc went through, so it rebuilds those summaries instead.
+    now = now or datetime.utcnow()
+    merged = merge_events(events)
+    if not merged:
+        return statuses
+
+    def fail(indexes, message):
+        for index in indexes:
+            statuses[index].update(status="error", error=message)
+
+    # Events only count for courses the student has joined, same as the single-event route
+    student_ids = list({student_obj_id for student_obj_id, _, _ in merged})
+    enrolled = {
+        (doc["studentId"], doc["courseId"])
+        for doc in db.course_activity_logs.find({"studentId": {"$in": student_ids}}, {"studentId": 1, "courseId": 1})
+    }
+
+    bucket_ops = []
+    bucket_keys = []
+    for key, entry in merged.items():
+        student_obj_id, course_id, day = key
+        if (student_obj_id, course_id) not in enrolled:
+            fail(entry["indexes"], "No matching course activity found")
+            continue
+        bucket_ops.append(UpdateOne(
+            bucket_filter(student_obj_id, course_id, day),
+            daily_activity_update(day, entry["duration"], now, batch_id),
+            upsert=True
+        ))
+        bucket_keys.append(key)
+
+    if not bucket_ops:
+        return statuses
+
+    failed_keys = set()
+    try:
+        db[BUCKETS_COLLECTION].bulk_write(bucket_ops, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            key = bucket_keys[error["index"]]
+            failed_keys.add(key)
+            fail(merged[key]["indexes"], error.get("errmsg", "Write failed"))
+
+    applied = [key for key in bucket_keys if key not in failed_keys]
+    if not applied:
+        return statuses
+
+    # lastAccessed lives on the buckets and in the summary, as with PUT /api/activity
+    if retry:
+        for student_obj_id in {key[0] for key in applied}:
+            rebuild_performance_summary(db, student_obj_id)
+    else:
+        record_activity_bulk(db, [(key[0], key[1], key[2], merged[key]["duration"]) for key in applied], now)
+    return statuses
+
+
+class ActivityBuffer:
+    # Write-behind buffer: events are merged in memory and flushed by a background thread
+    # at least every flush_seconds, or as soon as max_events are waiting. Each flush is one
+    # batch with its own id; a batch whose flush failed is retried as is, under the same id,
+    # before any newer events.
+
+    def __init__(self, db, flush_seconds=DEFAULT_FLUSH_SECONDS, max_events=DEFAULT_MAX_BUFFERED, on_flushed=None):
+        self.db = db
+        # Called with the studentIds of every flushed batch, e.g. to drop cached predictions
+        self.on_flushed = on_flushed
+        self.flush_seconds = flush_seconds
+        self.max_events = max_events
+        self.flushed = 0
+        self.failed = 0
+        self.retried = 0
+        self._events = []
+        self._retry = None  # (batch id, events) of the last failed flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+        atexit.register(self.flush)
+
+    def _ensure_worker(self):
+        # Started lazily so each forked worker gets its own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def add(self, events):
+        self._ensure_worker()
+        with self._lock:
+            self._events.extend(events)
+            pending = len(self._events)
+        if pending >= self.max_events:
+            self._wakeup.set()
+
+    def pending(self):
+        return len(self._events) + (len(self._retry[1]) if self._retry else 0)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[❌] Activity buffer flush failed: {e}")
+
+    def flush(self):
+        with self._flush_lock:
+            if self._retry is not None:
+                batch_id, events = self._retry
+                self.retried += len(events)
+                self._apply(batch_id, events, retry=True)
+                self._retry = None
+            with self._lock:
+                events, self._events = self._events, []
+            if events:
+                self._apply(ObjectId(), events, retry=False)
+
+    def _apply(self, batch_id, events, retry):
+        # Buffered events are renumbered locally; their statuses were already returned as queued
+        renumbered = [(i,) + tuple(event[1:]) for i, event in enumerate(events)]
+        statuses = [{"index": i, "status": "ok"} for i in range(len(renumbered))]
+        try:
+            apply_events(self.db, renumbered, statuses, batch_id=batch_id, retry=retry)
+        except Exception:
+            # Already acknowledged as queued: retried under the same id on the next flush
+            self._retry = (batch_id, events)
+            raise
+        failed = sum(1 for status in statuses if status["status"] != "ok")
+        self.failed += failed
+        self.flushed += len(statuses) - failed
+        if self.on_flushed is not None:
+            self.on_flushed({event[1] for event in events})
+
+    def stats(self):
+        return {
+            "pending": len(self._events),
+            "retrying": len(self._retry[1]) if self._retry else 0,
+            "flushed": self.flushed,
+            "retried": self.retried,
+            "failed": self.failed
+        }
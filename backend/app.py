@@ -1,19 +1,34 @@
 from flask import Flask, Response, jsonify, request , Blueprint
 from flask_cors import CORS
-from pymongo import MongoClient
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson.json_util import dumps
-from bson import SON
 import traceback
 from flask_pymongo import PyMongo
 from bson import ObjectId, json_util
-import calendar
-import joblib
-import numpy as np
-from collections import defaultdict
+import hmac
 from dotenv import load_dotenv
 import os
+from activity import insert_initial_logs, load_course_activities
+from activity_ingest import ActivityBuffer, apply_events, parse_events
+from collection_registry import CollectionRegistry
+from course_listing import (STREAM_BATCH_SIZE, course_filters, course_page, course_projection, iter_json_array,
+                            iter_ndjson, page_args, parse_limit)
+from course_search import DEFAULT_LIMIT as SEARCH_LIMIT, CourseSearch
+from dashboard import compute_dashboard
+from dashboard_cache import DashboardCache
+from metrics import install_request_metrics, metrics, register_command_listener
+from model_registry import ModelRegistry
+from mongo_client import DATABASE_NAME, get_client, pool_stats
+from performance import (SUMMARY_FIELD, build_summary, field_key, performance_view, rebuild_performance_summary,
+                         record_course_activity, record_course_added)
+from prediction_cache import PredictionCache, feature_hash, stored_prediction_update
+from recommendations import Recommender
+from report_storage import accepts_gzip, iter_gzip_chunks, iter_html_chunks, open_report_body
+from scoring import (DEFAULT_CHUNK_SIZE, preprocess_data_for_model, risk_score_for_label, score_students,
+                     validate_student_filter)
+from student_dashboard import fetch_dashboard_documents
 
 load_dotenv(dotenv_path="backend\.env")
 # Get FRONTEND_URL from environment variables
@@ -28,19 +43,62 @@ CORS(app, origins=[frontend_url], methods=["GET", "POST", "PUT", "OPTIONS"], all
 # else:
 #     CORS(app, origins=["http://localhost:3000"], methods=["GET", "POST", "PUT", "OPTIONS"], allow_headers=["Content-Type"])
 
-client = MongoClient(os.getenv("MongoURI"))
-db = client["anvesha"]
-
-model = joblib.load(r"models/dropout_risk_model.pkl")
-label_encoders = joblib.load(r"models/label_encoders.pkl")
+# Per-route request latency and MongoDB command timings, served on /metrics
+install_request_metrics(app)
+register_command_listener()
+
+# Pool size, timeouts, read preference and compression come from MONGO_* variables
+client = get_client(os.getenv("MongoURI"))
+db = client[DATABASE_NAME]
+
+# Known collections and dataset versions, kept in process instead of asked per request
+collection_registry = CollectionRegistry(db)
+# Course recommendations are served from an in-memory index of the catalog
+recommender = Recommender(db, collection_registry)
+# Full-text course search over the same catalog version
+course_search = CourseSearch(db, collection_registry)
+# Dataset dashboards only change when the loader scripts reload a collection
+dashboard_cache = DashboardCache(collection_registry)
+
+# Versioned models: loaded and warmed up before they become active, swapped without restart.
+# The active version is stored in Mongo; ACTIVE_MODEL_VERSION only applies until one is stored.
+model_registry = ModelRegistry(db=db)
+model_registry.load_initial(os.getenv("ACTIVE_MODEL_VERSION"))
+model_registry.install_reload_signal()
+# Repeated /model_predict calls for unchanged students skip the reads and the model
+prediction_cache = PredictionCache()
+# Write-behind buffer for bulk activity ingestion, flushed at least once a second; activity
+# feeds the risk features, so flushed students drop their cached prediction
+activity_buffer = ActivityBuffer(db, on_flushed=prediction_cache.invalidate_students)
+MAX_BULK_EVENTS = 10000
+MAX_BATCH_STUDENTS = 10000
 
 @app.route("/report/<report_id>")
 def view_report(report_id):
-    report = db["reports"].find_one({"_id": ObjectId(report_id)})
-    if report:
-        return Response(report["html"], mimetype="text/html")
-    else:
+    try:
+        report_obj_id = ObjectId(report_id)
+    except (InvalidId, TypeError):
+        return "Report not found", 404
+
+    # Never load the HTML with the document; bodies are streamed from GridFS
+    report = db["reports"].find_one({"_id": report_obj_id}, {"html": 0})
+    if not report:
         return "Report not found", 404
+
+    if "body_id" not in report:
+        # Reports saved before bodies moved to GridFS still carry inline HTML
+        legacy = db["reports"].find_one({"_id": report["_id"]}, {"html": 1})
+        return Response(legacy.get("html", ""), mimetype="text/html")
+
+    grid_out = open_report_body(db, report["body_id"])
+    if accepts_gzip(request.accept_encodings):
+        response = Response(iter_gzip_chunks(grid_out), mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Content-Length"] = str(grid_out.length)
+    else:
+        response = Response(iter_html_chunks(grid_out), mimetype="text/html")
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
     
 @app.route("/api/latest-report/<dataset>", methods=["GET"])
 def get_latest_report(dataset):
@@ -48,6 +106,7 @@ def get_latest_report(dataset):
         # Fetch the latest report for the specified dataset, sorted by 'generated_on' in descending order
         latest_report = db["reports"].find_one(
             {"dataset": dataset.lower()},
+            {"metadata": 1},  # Only the metadata, never the report body
             sort=[("generated_on", -1)]
         )
 
@@ -77,71 +136,11 @@ def get_latest_report(dataset):
 
 @app.route("/api/dashboard/<collection_name>", methods=["GET"])
 def get_dashboard_data(collection_name):
-    if collection_name not in db.list_collection_names():
+    if not collection_registry.exists(collection_name):
         return jsonify({"error": "Collection not found"}), 404
 
-    collection = db[collection_name]
-
-    total_students = collection.count_documents({})
-    dropout_students = collection.count_documents({"Target": "Dropout"})
-    dropout_rate = (dropout_students / total_students) * 100 if total_students else 0
-
-    # Utility: group by attribute and count dropouts
-    def group_by_attr_vs_dropout(field):
-        pipeline = [
-            {"$group": {
-                "_id": {field: f"${field}", "Target": "$Target"},
-                "count": {"$sum": 1}
-            }}
-        ]
-        results = collection.aggregate(pipeline)
-        grouped = defaultdict(lambda: defaultdict(int))
-        for row in results:
-            attr = row["_id"][field]
-            status = row["_id"]["Target"]
-            grouped[attr][status] += row["count"]
-        return grouped
-
-    gender_vs_dropout = group_by_attr_vs_dropout("Gender")
-    debtor_vs_dropout = group_by_attr_vs_dropout("Debtor")
-    tuition_vs_dropout = group_by_attr_vs_dropout("Tuition fees up to date")
-
-    # Optional: Age Bucket vs Dropout
-    age_bucket_map = {
-        "<18": [],
-        "18-22": [],
-        "23-26": [],
-        "27-30": [],
-        "31+": []
-    }
-
-    for doc in collection.find({}, {"Age at enrollment": 1, "Target": 1}):
-        age = doc.get("Age at enrollment", 0)
-        bucket = (
-            "<18" if age < 18 else
-            "18-22" if age <= 22 else
-            "23-26" if age <= 26 else
-            "27-30" if age <= 30 else
-            "31+"
-        )
-        age_bucket_map[bucket].append(doc.get("Target", "Unknown"))
-
-    age_vs_dropout = {}
-    for bucket, targets in age_bucket_map.items():
-        counts = defaultdict(int)
-        for t in targets:
-            counts[t] += 1
-        age_vs_dropout[bucket] = dict(counts)  # convert to normal dict for JSON serialization
-
-    return jsonify({
-        "total_students": total_students,
-        "dropout_students": dropout_students,
-        "dropout_rate": round(dropout_rate, 2),
-        "gender_vs_dropout": gender_vs_dropout,
-        "debtor_vs_dropout": debtor_vs_dropout,
-        "tuition_vs_dropout": tuition_vs_dropout,
-        "age_vs_dropout": age_vs_dropout
-    })
+    # All aggregates in a single $facet round trip, reused until the dataset is reloaded
+    return jsonify(dashboard_cache.get_or_compute(collection_name, lambda: compute_dashboard(db[collection_name])))
 
     
 @app.route('/api/solution-pathways', methods=['GET'])
@@ -250,8 +249,27 @@ def register():
         "presentDays": 0
     }
 
+    # Default course activity log with one placeholder course
+    now = datetime.utcnow()
+    default_course_log = {
+        "_id": ObjectId(),
+        "studentId": student_id,
+        "courseId": "default_course_id",
+        "courseTitle": "Default Course",
+        "origin": "NPTEL",
+        "joinLink": "https://nptel.ac.in/course/default",  # Optional, but good to include
+        "lastAccessed": now
+    }
+    placeholder_logs = [
+        {
+            "date": now,
+            "durationMinutes": 0
+        }
+    ]
+
     db.performance_analytics.insert_one({
         "studentId": student_id,
+        SUMMARY_FIELD: build_summary([dict(default_course_log, activityLogs=placeholder_logs)]),
         "subjectScores": subject_scores,
         "dailyProgress": daily_progress,
         "timeSpent": time_spent,
@@ -261,21 +279,8 @@ def register():
         "lastUpdated": datetime.utcnow()
     })
 
-    # Create default course activity log with one placeholder course
-    db.course_activity_logs.insert_one({
-        "studentId": student_id,
-        "courseId": "default_course_id",
-        "courseTitle": "Default Course",
-        "origin": "NPTEL",
-        "joinLink": "https://nptel.ac.in/course/default",  # Optional, but good to include
-        "activityLogs": [
-            {
-                "date": datetime.utcnow(),
-                "durationMinutes": 0
-            }
-        ],
-        "lastAccessed": datetime.utcnow()
-    })
+    db.course_activity_logs.insert_one(default_course_log)
+    insert_initial_logs(db, student_id, default_course_log["courseId"], placeholder_logs)
     
     return jsonify({"message": "Registration successful", "studentId": str(student_id)}), 201
 
@@ -355,6 +360,7 @@ def update_profile(student_id):
 
         if profile_update_result.matched_count == 0:
             return jsonify({"error": "Profile not found"}), 404
+        prediction_cache.invalidate_student(student_obj_id)
 
         return jsonify({"message": "Student and profile updated successfully"}), 200
 
@@ -362,24 +368,45 @@ def update_profile(student_id):
         return jsonify({"error": str(e)}), 500
 
 
+# ?limit=N and/or ?after=<cursor> pages with a keyset cursor (50 per page by default),
+# ?fields=a,b projects, and otherwise the full list is streamed (as one JSON array, or
+# NDJSON with ?stream=ndjson)
 @app.route('/api/courses', methods=['GET'])
 def get_courses():
     try:
-        filters = {}
+        filters = course_filters(request.args)
+        projection = course_projection(request.args.get('fields'))
 
-        discipline = request.args.get('discipline')
-        origin = request.args.get('origin')
-        level = request.args.get('level')
+        try:
+            page = page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if page is not None:
+            limit, after = page
+            return jsonify(course_page(db, filters, projection, limit, after)), 200
+
+        cursor = db.courses.find(filters, projection).batch_size(STREAM_BATCH_SIZE)
+        dumps = lambda document: app.json.dumps(document, separators=(",", ":"))
+
+        if request.args.get('stream') == 'ndjson':
+            return Response(iter_ndjson(cursor, dumps), mimetype="application/x-ndjson"), 200
+        return Response(iter_json_array(cursor, dumps), mimetype="application/json"), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        if discipline:
-            filters['discipline'] = discipline
-        if origin:
-            filters['origin'] = origin
-        if level:
-            filters['level'] = level
 
-        courses = list(db.courses.find(filters, {'_id': 0}))
-        return jsonify(courses), 200
+# ?q=<words> matches title, instructor, institute and discipline; words also match as prefixes
+@app.route('/api/courses/search', methods=['GET'])
+def search_courses():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'), SEARCH_LIMIT)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(course_search.search(query, limit)), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -392,128 +419,37 @@ def get_performance_analytics(student_id):
     try:
         student_obj_id = ObjectId(student_id)
 
-        # 1. Fetch course activity logs
-        activities = list(db.course_activity_logs.find({"studentId": student_obj_id}))
-
-        subject_scores = []
-        time_spent = []
-        daily_progress = {}
-
-        for activity in activities:
-            course_title = activity.get("courseTitle", "Unknown")
-            course_id = activity.get("courseId", "unknown")
-
-            logs = activity.get("activityLogs", [])
-            
-
-            # Simulated score based on latest activity duration
-            latest_log = logs[-1] if logs else {}
-            simulated_score = 70 + (latest_log.get("durationMinutes", 0) % 30)
-
-            subject_scores.append({
-                "subjectId": course_id,
-                "subject": course_title,
-                "score": simulated_score
-            })
-
-            total_minutes = sum(log.get("durationMinutes", 0) for log in logs)
-            time_spent.append({
-                "subject": course_title,
-                "minutes": total_minutes
-            })
-
-            for log in logs:
-                date_str = str(log.get("date"))  # Ensure it's a string
-                duration = log.get("durationMinutes", 0)
-                if date_str:
-                    daily_progress[date_str] = daily_progress.get(date_str, 0) + duration
-
-        daily_progress_arr = [
-            {
-                "date": str(date)[:10],  # Get 'YYYY-MM-DD',
-                "progress": minutes // 10  # Simulated progress
-            }
-            for date, minutes in sorted(daily_progress.items())
-        ]
-
-        # 3. Fetch attendance from student_profiles or fallback
-        now = datetime.utcnow()
-        total_days = calendar.monthrange(now.year, now.month)[1]
-        profile = db.student_profiles.find_one({"_id": student_obj_id})
-        attendance = profile.get("attendance") if profile and profile.get("attendance") else {
-            "totalDays": total_days,
-            "presentDays": len(daily_progress)  # fallback: assume active days as present
-        }
-
-        # 4. Compute riskScore
-        total_days = attendance.get("totalDays", 100)
-        present_days = attendance.get("presentDays", 0)
-
-        for activity in activities:
-            activity["_id"] = str(activity["_id"])
-            activity["studentId"] = str(activity["studentId"])
-        # 5. Construct performance object and upsert
-        data = {
-            "studentId": student_obj_id,
-            "subjectScores": [
-                {
-                    "subjectId": s["subjectId"],
-                    "subject": s["subject"],
-                    "score": float(s["score"])  # Ensure float (double)
-                } for s in subject_scores
-            ],
-            "timeSpent": time_spent,
-            "dailyProgress": daily_progress_arr,
-            "attendance": attendance,
-            "lastUpdated": datetime.utcnow(),
-            "courseActivityLogs": activities  # <-- Add this back
-        }
-
-
-        db.performance_analytics.update_one(
+        # Read-only: the summary is maintained whenever activity is recorded
+        performance = db.performance_analytics.find_one(
             {"studentId": student_obj_id},
-            {"$set": data},
-            upsert=True
+            {SUMMARY_FIELD: 1, "lastUpdated": 1}
         )
 
-        # Convert ObjectId to str for JSON response
-        data["studentId"] = str(student_obj_id)
+        if performance and SUMMARY_FIELD in performance:
+            summary = performance[SUMMARY_FIELD]
+            last_updated = performance.get("lastUpdated")
+        else:
+            # Not backfilled yet: build it from the activity logs once
+            summary, _ = rebuild_performance_summary(db, student_obj_id)
+            last_updated = None
 
-        return jsonify(data), 200
+        return jsonify(performance_view(student_obj_id, summary, last_updated)), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# Both recompute the maintained summary from course_activity_logs, which every
+# performance field is derived from
 @app.route("/api/performance/update-time/<student_id>", methods=["PUT"])
 def update_time_spent_from_activity(student_id):
     try:
         student_obj_id = ObjectId(student_id)
 
-        # Fetch activity logs for this student
-        activity_logs = list(db.course_activity_logs.find({"studentId": student_obj_id}))
-        if not activity_logs:
+        _, activity_count = rebuild_performance_summary(db, student_obj_id)
+        if not activity_count:
             return jsonify({"error": "No course activity logs found"}), 404
 
-        # Aggregate time spent by course title
-        time_spent_by_course = {}
-        for log in activity_logs:
-            course_title = log.get("courseTitle", "Unknown Course")
-            total_minutes = sum(entry.get("durationMinutes", 0) for entry in log.get("activityLogs", []))
-            time_spent_by_course[course_title] = time_spent_by_course.get(course_title, 0) + total_minutes
-
-        # Format for Mongo update
-        time_spent_array = [{"subject": title, "minutes": minutes} for title, minutes in time_spent_by_course.items()]
-
-        # Update performance_analytics
-        db.performance_analytics.update_one(
-            {"studentId": student_obj_id},
-            {"$set": {
-                "timeSpent": time_spent_array,
-                "lastUpdated": datetime.utcnow()
-            }}
-        )
-
         return jsonify({"message": "Time spent updated from course activity logs"}), 200
 
     except Exception as e:
@@ -523,32 +459,11 @@ def update_time_spent_from_activity(student_id):
 def update_daily_progress_from_activity(student_id):
     try:
         student_obj_id = ObjectId(student_id)
-        activity_logs = list(db.course_activity_logs.find({"studentId": student_obj_id}))
 
-        if not activity_logs:
+        _, activity_count = rebuild_performance_summary(db, student_obj_id)
+        if not activity_count:
             return jsonify({"error": "No course activity logs found"}), 404
 
-        daily_minutes = {}
-
-        for log in activity_logs:
-            for entry in log.get("activityLogs", []):
-                date_str = entry.get("date")
-                minutes = entry.get("durationMinutes", 0)
-                daily_minutes[date_str] = daily_minutes.get(date_str, 0) + minutes
-
-        # Convert to list sorted by date
-        daily_progress = [
-            {"date": date, "progress": minutes} for date, minutes in sorted(daily_minutes.items())
-        ]
-
-        db.performance_analytics.update_one(
-            {"studentId": student_obj_id},
-            {"$set": {
-                "dailyProgress": daily_progress,
-                "lastUpdated": datetime.utcnow()
-            }}
-        )
-
         return jsonify({"message": "Daily progress updated"}), 200
 
     except Exception as e:
@@ -559,7 +474,14 @@ def update_daily_progress_from_activity(student_id):
 def get_course_activity(student_id):
     try:
         student_obj_id = ObjectId(student_id)
-        activities = list(db.course_activity_logs.find({"studentId": student_obj_id}))
+        # Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD only reads the monthly buckets in range; both days are included
+        try:
+            since = datetime.strptime(request.args["from"], "%Y-%m-%d") if request.args.get("from") else None
+            until = datetime.strptime(request.args["to"], "%Y-%m-%d") + timedelta(days=1) if request.args.get("to") else None
+        except ValueError:
+            return jsonify({"error": "from and to must be dates as YYYY-MM-DD"}), 400
+
+        activities = load_course_activities(db, student_obj_id, since, until)
         for activity in activities:
             activity["_id"] = str(activity["_id"])
             activity["studentId"] = str(activity["studentId"])
@@ -591,16 +513,47 @@ def add_course_activity():
             "courseTitle": data["courseTitle"],
             "origin": data["origin"],
             "joinLink": data["joinLink"],
-            "activityLogs": [],
             "lastAccessed": datetime.utcnow()
         }
 
         inserted_id = db.course_activity_logs.insert_one(record).inserted_id
+        record_course_added(db, student_obj_id, record)
+        prediction_cache.invalidate_student(student_obj_id)
         return jsonify({"message": "Course activity initialized", "id": str(inserted_id)}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# Many {studentId, courseId, durationMinutes, date} events in one call; ?buffered=true
+# queues them for the write-behind buffer instead of writing before responding
+@app.route("/api/activity/bulk", methods=["POST"])
+def bulk_course_activity():
+    try:
+        data = request.get_json()
+        raw_events = data.get("events") if isinstance(data, dict) else data
+        if not isinstance(raw_events, list):
+            return jsonify({"error": "Expected a list of events"}), 400
+        if len(raw_events) > MAX_BULK_EVENTS:
+            return jsonify({"error": f"At most {MAX_BULK_EVENTS} events per request"}), 413
+
+        now = datetime.utcnow()
+        events, statuses = parse_events(raw_events, now)
+
+        if request.args.get("buffered") == "true":
+            activity_buffer.add(events)
+            for status in statuses:
+                if status["status"] == "ok":
+                    status["status"] = "queued"
+            return jsonify({"results": statuses}), 202
+
+        apply_events(db, events, statuses, now)
+        prediction_cache.invalidate_students({event[1] for event in events})
+        return jsonify({"results": statuses}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/activity/<student_id>/<course_id>", methods=["PUT"])
 def update_course_activity(student_id, course_id):
     try:
@@ -610,35 +563,12 @@ def update_course_activity(student_id, course_id):
             return jsonify({"error": "Duration must be positive"}), 400
 
         student_obj_id = ObjectId(student_id)
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # First try to update an existing log for today
-        result = db.course_activity_logs.update_one(
-            {
-                "studentId": student_obj_id,
-                "courseId": course_id,
-                "activityLogs.date": today
-            },
-            {
-                "$inc": {"activityLogs.$.durationMinutes": duration},
-                "$set": {"lastAccessed": datetime.utcnow()}
-            }
-        )
+        now = datetime.utcnow()
 
-        # If no matching activity log for today, push a new one
-        if result.matched_count == 0:
-            result = db.course_activity_logs.update_one(
-                {
-                    "studentId": student_obj_id,
-                    "courseId": course_id
-                },
-                {
-                    "$push": {"activityLogs": {"date": today, "durationMinutes": duration}},
-                    "$set": {"lastAccessed": datetime.utcnow()}
-                }
-            )
-            if result.matched_count == 0:
-                return jsonify({"error": "No matching course activity found"}), 404
+        # Today's minutes go to the performance summary and the monthly bucket, one update each
+        if not record_course_activity(db, student_obj_id, course_id, duration, now):
+            return jsonify({"error": "No matching course activity found"}), 404
+        prediction_cache.invalidate_student(student_obj_id)
 
         return jsonify({"message": "Activity log updated"}), 200
 
@@ -649,16 +579,17 @@ def get_student_dashboard(student_id):
     try:
         object_id = ObjectId(student_id)
 
-        # Fetch from collections
-        student = db.students.find_one({"_id": object_id})
-        profile = db.profiles.find_one({"studentId": object_id})
-        performance = db.performance_analytics.find_one({"studentId": object_id})
-        course_logs = list(db.course_activity_logs.find({"studentId": object_id}))
+        # Fetch the needed fields of all four collections with one $lookup aggregation
+        student, profile, performance, course_logs = fetch_dashboard_documents(db, object_id)
 
         # Basic check
         if not student or not profile or not performance:
             return jsonify({"error": "Student data not found"}), 404
 
+        # Derived fields come from the maintained activity summary when it exists
+        if SUMMARY_FIELD in performance:
+            performance = dict(performance, **performance_view(object_id, performance[SUMMARY_FIELD]))
+
         # Daily progress
         daily_progress = [
             {"name": f"date {i+1}", "progress": w.get("progress", 0)}
@@ -671,14 +602,15 @@ def get_student_dashboard(student_id):
         present_days = attendance_data.get("presentDays", 0)
         attendance_percent = round((present_days / total_days) * 100) if total_days else 0
 
-        # Ongoing courses
+        # Ongoing courses; activity writes keep lastAccessed in the summary, not the enrollment
+        summary_courses = performance.get(SUMMARY_FIELD, {}).get("courses", {})
         ongoing_courses = [
             {   
                 "courseId" : log.get("courseId"),
                 "title": log.get("courseTitle", "Untitled"),
                 "origin": log.get("origin"),
                 "joinLink": log.get("joinLink"),
-                "lastAccessed": log.get("lastAccessed")
+                "lastAccessed": summary_courses.get(field_key(log.get("courseId")), {}).get("lastAccessed") or log.get("lastAccessed")
             }
             for log in course_logs
         ]
@@ -727,45 +659,16 @@ def get_student_dashboard(student_id):
 def recommend_courses(student_id):
     try:
         # Step 1: Get student's enrolled courseIds
-        joined_courses = db.course_activity_logs.find({"studentId": ObjectId(student_id)})
+        joined_courses = db.course_activity_logs.find({"studentId": ObjectId(student_id)}, {"courseId": 1})
         joined_ids = [course["courseId"] for course in joined_courses]
 
-        # Step 2: Get metadata for joined courses
-        joined_metadata = db.courses.find({"course_id": {"$in": joined_ids}})
-        disciplines = set()
-        domains = set()
-        levels = set()
-
-        for course in joined_metadata:
-            if course.get("discipline"):
-                disciplines.add(course["discipline"])
-            if course.get("nptel_domain"):
-                domains.add(course["nptel_domain"])
-            if course.get("level"):
-                levels.add(course["level"])
-
-        # Step 3: Aggregate with scoring logic
-        pipeline = [
-            {"$match": {"course_id": {"$nin": joined_ids}}},
-            {"$addFields": {
-                "score": {
-                    "$add": [
-                        {"$cond": [{"$in": ["$discipline", list(disciplines)]}, 1, 0]},
-                        {"$cond": [{"$in": ["$nptel_domain", list(domains)]}, 1, 0]},
-                        {"$cond": [{"$in": ["$level", list(levels)]}, 1, 0]}
-                    ]
-                }
-            }},
-            {"$match": {"score": {"$gt": 0}}},
-            {"$sort": SON([("score", -1)])},
-            {"$limit": 10}
-        ]
+        # ?mode=content ranks by title/discipline/domain/institute/level similarity instead
+        mode = request.args.get('mode', 'categorical')
+        if mode not in Recommender.INDEX_TYPES:
+            return jsonify({"error": f"Unknown mode: {mode}"}), 400
 
-        recommended_courses = list(db.courses.aggregate(pipeline))
-
-        # Step 4: Convert ObjectId and return
-        for course in recommended_courses:
-            course["_id"] = str(course["_id"])
+        # Step 2: Score the catalog from the in-memory index (rebuilt when the catalog is imported)
+        recommended_courses = recommender.recommend(joined_ids, mode=mode)
 
         return jsonify(recommended_courses), 200
 
@@ -775,6 +678,14 @@ def recommend_courses(student_id):
     # Route to fetch necessary data for model and get predictions
 @app.route('/model_predict/<student_id>', methods=['GET'])
 def model_predict(student_id):
+    # Use one model version for the whole request, even if a swap happens meanwhile
+    model_version = model_registry.active()
+
+    # Served without touching Mongo when this worker scored the student moments ago
+    cached = prediction_cache.get_student(student_id, model_version.version)
+    if cached is not None:
+        return jsonify(cached)
+
     # Fetch student data
     student = db.students.find_one({"_id": ObjectId(student_id)})
     if not student:
@@ -791,158 +702,178 @@ def model_predict(student_id):
         return jsonify({"error": "Profile analytics not found"}), 404
 
     # Fetch course analytics logs
-    course_analytics = db.course_activity_logs.find_one({"studentId": ObjectId(student_id)})
+    course_analytics = db.course_activity_logs.find_one({"studentId": ObjectId(student_id)}, {"activityLogs": 0})
     if not course_analytics:
         return jsonify({"error": "Course analytics not found"}), 404
 
     # Data preprocessing for model input
-    features = preprocess_data_for_model(student, profile, performance_analytics, course_analytics)
-
-    # Feed data to model and get predictions (e.g., dropout risk)
-    prediction = model.predict([features])
-    predicted_risk_label = label_encoders['riskLabel'].inverse_transform([prediction])[0]  # Inverse transform to get label
-    risk_label_to_score = {
-        "high": 1,
-        "medium": 0.5,
-        "low": 0
-    }
+    features = preprocess_data_for_model(student, profile, performance_analytics, course_analytics, model_version.encoding_tables)
+    features_key = feature_hash(features)
+
+    # Same features and model as a previous call (in this worker, or stored by any worker) give the same label
+    predicted_risk_label = prediction_cache.get_label(model_version.version, features_key)
+    stored = (
+        performance_analytics.get("featureHash") == features_key
+        and performance_analytics.get("modelVersion") == model_version.version
+        and "riskLabel" in performance_analytics
+    )
+    if predicted_risk_label is None and stored:
+        predicted_risk_label = performance_analytics["riskLabel"]
+        prediction_cache.count_stored_hit()
+    if predicted_risk_label is None:
+        prediction_cache.count_miss()
+        # Feed data to model and get predictions (e.g., dropout risk)
+        prediction = model_version.predict([features])
+        predicted_risk_label = str(model_version.label_encoders['riskLabel'].inverse_transform(prediction)[0])  # Inverse transform to get label
+    prediction_cache.put_label(model_version.version, features_key, predicted_risk_label)
 
     # Set the risk score based on the predicted label
-    risk_score = risk_label_to_score.get(predicted_risk_label, 0)  # Default to 0 if label is not found
-
-    # Ensure risk_score is a native Python int
-    risk_score = int(risk_score)
+    risk_score = risk_score_for_label(predicted_risk_label)
 
-    # Update the performance_analytics collection with risk score and label
-    db.performance_analytics.update_one(
-        {"studentId": ObjectId(student_id)},
-        {
-            "$set": {
-                "riskScore": risk_score,
-                "riskLabel": predicted_risk_label
-            }
-        },
-        upsert=True  # If no matching record, it will create a new one
-    )
+    # Update the performance_analytics collection with risk score and label, unless it already holds them
+    if not (stored and performance_analytics.get("riskLabel") == predicted_risk_label):
+        db.performance_analytics.update_one(
+            {"studentId": ObjectId(student_id)},
+            stored_prediction_update(risk_score, predicted_risk_label, model_version.version, features_key),
+            upsert=True  # If no matching record, it will create a new one
+        )
 
     # Return model prediction as response
     result = {
         "studentId": student_id,
         "dropoutRiskPrediction": predicted_risk_label,
-        "riskScore": risk_score
+        "riskScore": risk_score,
+        "modelVersion": model_version.version
     }
+    prediction_cache.put_student(student_id, model_version.version, result)
 
     return jsonify(result)
 
-import numpy as np
-from datetime import datetime
 
-# Example of the preprocessing function:
-def preprocess_data_for_model(student, profile, performance_analytics, course_analytics):
-    # Helper function to safely transform categorical variables using label encoders
-    def safe_transform(label_encoder, value):
+# Score many students in one call: body is {"studentIds": [...]} or, for admins,
+# {"filter": {...}} with plain equality on scoring.FILTER_FIELDS
+@app.route('/model_predict/batch', methods=['POST'])
+def model_predict_batch():
+    try:
+        data = request.get_json() or {}
+        student_ids = data.get("studentIds")
+        student_filter = data.get("filter")
+
+        if student_ids is None and student_filter is None:
+            return jsonify({"error": "Provide studentIds or filter"}), 400
+        if student_ids is not None and not isinstance(student_ids, list):
+            return jsonify({"error": "studentIds must be a list"}), 400
+        if student_ids is not None and len(student_ids) > MAX_BATCH_STUDENTS:
+            return jsonify({"error": f"At most {MAX_BATCH_STUDENTS} studentIds per request"}), 413
+        if student_ids is None:
+            # A filter can select the whole collection, so it is an admin operation
+            if not is_admin_request():
+                return jsonify({"error": "Forbidden"}), 403
+            try:
+                student_filter = validate_student_filter(student_filter)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        else:
+            student_filter = None
+
         try:
-            if value in label_encoder.classes_:
-                return label_encoder.transform([value])[0]
-            else:
-                return 0  # Default encoding for unknown values
-        except KeyError:
-            return 0  # Default encoding for unknown values
-
-    # Extract features from the student document
-    gender = student.get('gender', 'Unknown')
-    age = student.get('age', 0)
-    standard = student.get('standard' , 0)
-    caste = student.get('caste', 'Unknown')
-    area = student.get('area', 'Unknown')
-    state = student.get('state', 'Unknown')
-    school = student.get('school', 'Unknown')
-    marital_status = student.get('maritalStatus', 'Unknown')
-    course = student.get('course', 'Unknown')
-    previous_qualification = student.get('previousQualification', 'Unknown')
-    mother_qualification = student.get('motherQualification', 'Unknown')
-    father_qualification = student.get('fatherQualification', 'Unknown')
-    mother_occupation = student.get('motherOccupation', 'Unknown')
-    father_occupation = student.get('fatherOccupation', 'Unknown')
-    special_needs = student.get('specialNeeds', 'Unknown')
-    debtor = student.get('debtor', 'Unknown')
-    tuition_up_to_date = student.get('tuitionUpToDate', 'Unknown')
-    scholarship_holder = student.get('scholarshipHolder', 'Unknown')
-    profile_completed = student.get('profileCompleted', False)
-
-    # Calculate days since registration
-    registered_on = student.get('registeredOn')
-    if registered_on:
-        days_since_registration = (datetime.now() - registered_on).days
-    else:
-        days_since_registration = 0
-
-    # Calculate total activity minutes from performance_analytics
-    total_activity_minutes = sum(item['durationMinutes'] for item in performance_analytics.get('activityLogs', []))
-
-    # Calculate attendance rate
-    attendance_data = profile.get('attendance', {})
-    total_days = attendance_data.get('totalDays', 0)
-    present_days = attendance_data.get('presentDays', 0)
-    attendance_rate = present_days / total_days if total_days > 0 else 0
-
-    # Calculate average score from subjectScores
-    subject_scores = profile.get('subjectScores', [])
-    total_score = sum(subject['score'] for subject in subject_scores)
-    average_score = total_score / len(subject_scores) if subject_scores else 0
-
-    # Encode categorical features using label encoders
-    gender_encoded = safe_transform(label_encoders['gender'], gender)
-    marital_status_encoded = safe_transform(label_encoders['maritalStatus'], marital_status)
-    course_encoded = safe_transform(label_encoders['course'], course)
-    previous_qualification_encoded = safe_transform(label_encoders['previousQualification'], previous_qualification)
-    mother_qualification_encoded = safe_transform(label_encoders['motherQualification'], mother_qualification)
-    father_qualification_encoded = safe_transform(label_encoders['fatherQualification'], father_qualification)
-    
-    # Encode other categorical features (such as caste, area, standard, state, school, etc.)
-    caste_encoded = safe_transform(label_encoders['caste'], caste)
-    area_encoded = safe_transform(label_encoders['area'], area)
-    state_encoded = safe_transform(label_encoders['state'], state)
-    school_encoded = safe_transform(label_encoders['school'], school)
-    
-    # Encode other potential categorical features
-    mother_occupation_encoded = safe_transform(label_encoders['motherOccupation'], mother_occupation)
-    father_occupation_encoded = safe_transform(label_encoders['fatherOccupation'], father_occupation)
-    special_needs_encoded = safe_transform(label_encoders['specialNeeds'], special_needs)
-    debtor_encoded = safe_transform(label_encoders['debtor'], debtor)
-    tuition_up_to_date_encoded = safe_transform(label_encoders['tuitionUpToDate'], tuition_up_to_date)
-    scholarship_holder_encoded = safe_transform(label_encoders['scholarshipHolder'], scholarship_holder)
-
-    # Feature vector (combine all features)
-    features = np.array([
-        gender_encoded,
-        age,
-        caste_encoded,
-        area_encoded,
-        standard,
-        state_encoded,
-        school_encoded,
-        marital_status_encoded,
-        course_encoded,
-        previous_qualification_encoded,
-        mother_qualification_encoded,
-        father_qualification_encoded,
-        mother_occupation_encoded,
-        father_occupation_encoded,
-        special_needs_encoded,
-        debtor_encoded,
-        tuition_up_to_date_encoded,
-        scholarship_holder_encoded,
-        profile_completed,
-        days_since_registration,
-        total_activity_minutes,
-        attendance_rate,
-        average_score
-    ])
-
-    return features
+            chunk_size = int(data.get("chunkSize", DEFAULT_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({"error": "chunkSize must be an integer"}), 400
+        if chunk_size <= 0:
+            return jsonify({"error": "chunkSize must be positive"}), 400
+
+        summary = score_students(
+            db, model_registry.active(),
+            student_ids=student_ids,
+            student_filter=student_filter,
+            chunk_size=chunk_size
+        )
+        return jsonify(summary), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+
+def is_admin_request():
+    # Admin routes need the X-Admin-Token header to match ADMIN_TOKEN; without a token they
+    # stay closed unless ADMIN_OPEN=1 is set for local development
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        return os.getenv("ADMIN_OPEN") == "1"
+    return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), admin_token)
 
 
+@app.route('/api/admin/models', methods=['GET'])
+def list_model_versions():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "active": model_registry.active().version,
+        "loaded": model_registry.versions(),
+        "available": sorted(model_registry.available_versions())
+    }), 200
+
+
+@app.route('/api/admin/dashboard-cache', methods=['GET', 'DELETE'])
+def dashboard_cache_admin():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == 'DELETE':
+        dashboard_cache.invalidate(request.args.get('collection'))
+        return jsonify({"message": "Dashboard cache cleared"}), 200
+    return jsonify(dashboard_cache.stats()), 200
+
+
+# Write-behind activity buffer: events waiting, awaiting a retry, written, retried and rejected
+@app.route('/api/admin/activity-buffer', methods=['GET'])
+def activity_buffer_admin():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(activity_buffer.stats()), 200
+
+
+# Prometheus text format: request latency per route/status and Mongo commands per issuing route
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4"), 200
+
+
+# Hit/miss counters per cache level; DELETE drops every cached prediction
+@app.route('/api/admin/prediction-cache', methods=['GET', 'DELETE'])
+def prediction_cache_admin():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == 'DELETE':
+        prediction_cache.clear()
+        return jsonify({"message": "Prediction cache cleared"}), 200
+    return jsonify(prediction_cache.stats()), 200
+
+
+# Pool limits and live counters (checked out, peak, wait time) per MongoDB server
+@app.route('/api/admin/db-pool', methods=['GET'])
+def db_pool_admin():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(pool_stats()), 200
+
+
+# Load (and warm up) a version, then make it the active one in every worker: body is
+# {"version": "..."} or empty for newest
+@app.route('/api/admin/models/activate', methods=['POST'])
+def activate_model_version():
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        model_version = model_registry.reload(data.get("version"), publish=True)
+        return jsonify({"message": "Model activated", "active": model_version.describe()}), 200
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
     
 if __name__ == "__main__":
     app.run(debug=True)
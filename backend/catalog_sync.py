@@ -0,0 +1,107 @@
+import hashlib
+import json
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pymongo import DeleteMany, InsertOne, ReplaceOne
+
+from collection_registry import bump_dataset_version
+
+CATALOG_COLLECTION = "courses"
+
+
+def _normalize_value(value):
+    if isinstance(value, (list, dict)):
+        return value
+    if value is None or value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return _normalize_value(value.item())
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def normalize_course(record):
+    # The form a course is stored in: trimmed strings, "" for missing cells, plain Python values
+    return {str(field): _normalize_value(value) for field, value in record.items() if field != "_id"}
+
+
+def course_hash(course):
+    encoded = json.dumps(course, sort_keys=True, default=lambda value: (
+        value.isoformat() if isinstance(value, datetime) else str(value)
+    ))
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def catalog_scope(origin):
+    # Courses this source owns; older imports did not set origin at all
+    return {"$or": [{"origin": origin}, {"origin": {"$exists": False}}]}
+
+
+def sync_catalog(db, records, origin="NPTEL", dry_run=False):
+    # Diff the sheet against the stored catalog by course_id and write only the difference.
+    # Courses are replaced in place, never wiped first, so readers always see a full catalog.
+    incoming = {}
+    skipped = 0
+    for record in records:
+        course = normalize_course(record)
+        course["origin"] = origin
+        if course.get("course_id") in ("", None):
+            skipped += 1
+            continue
+        incoming[str(course["course_id"])] = course  # Last row wins on duplicate ids
+
+    stored = {}
+    duplicate_ids = []
+    for document in db[CATALOG_COLLECTION].find(catalog_scope(origin)):
+        key = str(document.get("course_id"))
+        if key in stored:
+            duplicate_ids.append(document["_id"])  # Left behind by earlier append-only imports
+            continue
+        stored[key] = (document["_id"], course_hash(normalize_course(document)))
+
+    operations = []
+    changes = {"inserted": [], "updated": [], "deleted": []}
+    for key, course in incoming.items():
+        existing = stored.get(key)
+        if existing is None:
+            operations.append(InsertOne(course))
+            changes["inserted"].append(key)
+        elif existing[1] != course_hash(course):
+            operations.append(ReplaceOne({"_id": existing[0]}, course))
+            changes["updated"].append(key)
+
+    removed = [key for key in stored if key not in incoming]
+    changes["deleted"] = removed
+    stale_ids = [stored[key][0] for key in removed] + duplicate_ids
+    if stale_ids:
+        operations.append(DeleteMany({"_id": {"$in": stale_ids}}))
+
+    if operations and not dry_run:
+        db[CATALOG_COLLECTION].bulk_write(operations, ordered=False)
+        # Running API workers rebuild their course indexes on the next request
+        bump_dataset_version(db, CATALOG_COLLECTION)
+
+    changes["unchanged"] = len(incoming) - len(changes["inserted"]) - len(changes["updated"])
+    changes["duplicatesRemoved"] = len(duplicate_ids)
+    changes["skipped"] = skipped
+    return changes
+
+
+def print_changeset(changes, dry_run=False, sample=10):
+    prefix = "Would apply" if dry_run else "Applied"
+    print(
+        f"{prefix}: {len(changes['inserted'])} inserted, {len(changes['updated'])} updated, "
+        f"{len(changes['deleted'])} deleted, {changes['unchanged']} unchanged, "
+        f"{changes['duplicatesRemoved']} duplicates removed, {changes['skipped']} rows without course_id skipped"
+    )
+    for kind in ("inserted", "updated", "deleted"):
+        if changes[kind]:
+            shown = ", ".join(changes[kind][:sample])
+            more = f" (+{len(changes[kind]) - sample} more)" if len(changes[kind]) > sample else ""
+            print(f"  {kind}: {shown}{more}")
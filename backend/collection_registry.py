@@ -0,0 +1,126 @@
+import threading
+import time
+
+# Loaders bump {_id: <collection>, version: n} here whenever they rewrite a dataset collection
+VERSIONS_COLLECTION = "dataset_versions"
+
+DEFAULT_POLL_SECONDS = 5
+DEFAULT_NAMES_REFRESH_SECONDS = 60
+
+
+def bump_dataset_version(db, collection_name):
+    # Called after a dataset collection is (re)loaded so every process sees the change
+    db[VERSIONS_COLLECTION].update_one(
+        {"_id": collection_name},
+        {"$inc": {"version": 1}, "$currentDate": {"reloadedOn": True}},
+        upsert=True
+    )
+
+
+class CollectionRegistry:
+    # In-process view of which collections exist and the data version of each dataset.
+    # A background thread polls the small dataset_versions collection; the full
+    # list_collection_names call only runs when a loader reports a change or every
+    # names_refresh_seconds, so lookups are plain set/dict reads.
+
+    def __init__(self, db, poll_seconds=DEFAULT_POLL_SECONDS, names_refresh_seconds=DEFAULT_NAMES_REFRESH_SECONDS):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.names_refresh_seconds = names_refresh_seconds
+        self._names = frozenset()
+        self._versions = {}
+        self._names_refreshed_at = 0
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def ensure_started(self):
+        # Started lazily so each forked worker gets its own thread
+        if self._poller is not None and self._poller.is_alive():
+            return
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self.refresh()
+            self._poller = threading.Thread(target=self._poll, daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                changed = self.refresh_versions()
+                if changed or time.monotonic() - self._names_refreshed_at > self.names_refresh_seconds:
+                    self.refresh_names()
+            except Exception as e:
+                print(f"[❌] Collection registry refresh failed: {e}")
+
+    def refresh(self):
+        self.refresh_versions()
+        self.refresh_names()
+
+    def refresh_names(self):
+        self._names = frozenset(self.db.list_collection_names())
+        self._names_refreshed_at = time.monotonic()
+
+    def refresh_versions(self):
+        versions = {doc["_id"]: doc.get("version", 0) for doc in self.db[VERSIONS_COLLECTION].find({}, {"version": 1})}
+        changed = versions != self._versions
+        self._versions = versions
+        return changed
+
+    def exists(self, collection_name):
+        self.ensure_started()
+        return collection_name in self._names
+
+    def names(self):
+        self.ensure_started()
+        return self._names
+
+    def version_of(self, collection_name):
+        self.ensure_started()
+        return self._versions.get(collection_name, 0)
+
+    def versions(self):
+        return dict(self._versions)
+
+
+class VersionedIndex:
+    # An in-memory structure built from one version of a dataset. Only the first build runs
+    # on the calling thread; after the version moves on, lookups keep getting the previous
+    # build while a background thread builds the new one and swaps it in.
+
+    def __init__(self, registry, collection_name, build):
+        self.registry = registry
+        self.collection_name = collection_name
+        self.build = build
+        self._built = None  # (version, value)
+        self._building = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self.registry.version_of(self.collection_name)
+        built = self._built
+        if built is None:
+            with self._lock:
+                if self._built is None:
+                    self._built = (version, self.build())
+                built = self._built
+        if built[0] != version:
+            self._start_rebuild(version)
+        return built[1]
+
+    def _start_rebuild(self, version):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, args=(version,), daemon=True).start()
+
+    def _rebuild(self, version):
+        try:
+            self._built = (version, self.build())
+        except Exception as e:
+            print(f"[❌] Rebuilding the {self.collection_name} index failed: {e}")
+        finally:
+            with self._lock:
+                self._building = False
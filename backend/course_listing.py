@@ -0,0 +1,82 @@
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def course_filters(args):
+    filters = {}
+    for field in ("discipline", "origin", "level"):
+        value = args.get(field)
+        if value:
+            filters[field] = value
+    return filters
+
+
+def course_projection(fields_param):
+    # ?fields=title,course_id -> only those fields; _id is only ever used as the page cursor
+    if not fields_param:
+        return {"_id": 0}
+    fields = [field.strip() for field in fields_param.split(",") if field.strip() and field.strip() != "_id"]
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+    return projection
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    # Positive integer, capped at MAX_PAGE_SIZE; ValueError otherwise
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a positive integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def page_args(args):
+    # (limit, after) when a page is asked for with ?limit or ?after, None to stream the full list
+    if not args.get("limit") and not args.get("after"):
+        return None
+    after = args.get("after") or None
+    if after is not None and not ObjectId.is_valid(after):
+        raise ValueError("Invalid page cursor")
+    return parse_limit(args.get("limit")), after
+
+
+def course_page(db, filters, projection, limit, after=None):
+    # Keyset pagination on _id: each page is an index range scan, however deep it is
+    query = dict(filters)
+    if after:
+        query["_id"] = {"$gt": ObjectId(after)}
+
+    # _id is always fetched for the cursor and dropped from the output
+    fields = [field for field in projection if field != "_id"]
+    page_projection = {field: 1 for field in fields} if fields else None
+
+    documents = list(db.courses.find(query, page_projection).sort("_id", 1).limit(limit + 1))
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = str(documents[-1]["_id"]) if has_more else None
+
+    for document in documents:
+        del document["_id"]
+    return {"courses": documents, "nextCursor": next_cursor}
+
+
+def iter_json_array(cursor, dumps):
+    # The same JSON array as before, produced document by document
+    yield "["
+    first = True
+    for document in cursor:
+        yield ("" if first else ",") + dumps(document)
+        first = False
+    yield "]\n"
+
+
+def iter_ndjson(cursor, dumps):
+    for document in cursor:
+        yield dumps(document) + "\n"
@@ -0,0 +1,107 @@
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+from collection_registry import VersionedIndex
+
+# Searchable fields and how much a match in each one counts
+FIELD_WEIGHTS = {"title": 3.0, "discipline": 2.0, "instructor": 1.5, "institute": 1.0}
+
+DEFAULT_LIMIT = 20
+MIN_PREFIX_LENGTH = 2
+# A prefix expands to at most this many vocabulary terms: the ones found in the most
+# courses, so a short prefix keeps its common completions rather than the first ones A-Z
+MAX_PREFIX_TERMS = 64
+PREFIX_MATCH_WEIGHT = 0.7
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    # term -> {catalog position: field-weighted term frequency}, plus the sorted vocabulary
+    # for prefix lookups. Scores are summed tf-idf; every query token has to match.
+
+    def __init__(self, courses):
+        self.courses = courses
+        postings = defaultdict(lambda: defaultdict(float))
+        for position, course in enumerate(courses):
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(course.get(field) or ""):
+                    postings[token][position] += weight
+
+        self.postings = {term: dict(docs) for term, docs in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        total = max(len(courses), 1)
+        self.idf = {term: math.log(1 + total / len(docs)) for term, docs in self.postings.items()}
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(list(db.courses.find({}, {"_id": 0})))
+
+    def _expand(self, token):
+        # The exact term plus vocabulary terms it is a prefix of
+        terms = [(token, 1.0)] if token in self.postings else []
+        if len(token) < MIN_PREFIX_LENGTH:
+            return terms
+
+        # Terms starting with the token form one contiguous run of the sorted vocabulary
+        start = bisect.bisect_right(self.vocabulary, token)
+        end = bisect.bisect_right(self.vocabulary, token + "\uffff", start)
+        if end - start > MAX_PREFIX_TERMS:
+            # Document frequency first, sorted order on ties
+            kept = heapq.nsmallest(MAX_PREFIX_TERMS, range(start, end),
+                                   key=lambda i: (-len(self.postings[self.vocabulary[i]]), i))
+        else:
+            kept = range(start, end)
+        return terms + [(self.vocabulary[i], PREFIX_MATCH_WEIGHT) for i in kept]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        scores = None
+        for token in tokens:
+            # Best-matching expansion per course for this token
+            token_scores = {}
+            for term, match_weight in self._expand(token):
+                idf = self.idf[term]
+                for position, tf in self.postings[term].items():
+                    score = match_weight * tf * idf
+                    if score > token_scores.get(position, 0):
+                        token_scores[position] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {p: s + token_scores[p] for p, s in scores.items() if p in token_scores}
+            if not scores:
+                return []
+
+        # Highest score first, catalog order on ties
+        ranked = heapq.nsmallest(limit, ((-score, position) for position, score in scores.items()))
+        return [dict(self.courses[position], score=round(-score, 4)) for score, position in ranked]
+
+
+class CourseSearch:
+    # One SearchIndex per catalog version; catalog imports bump the "courses" version and
+    # the index is rebuilt in the background while the previous one keeps serving
+
+    def __init__(self, db, registry):
+        self.db = db
+        self.registry = registry
+        self._index = VersionedIndex(registry, "courses", lambda: SearchIndex.from_db(db))
+
+    def index(self):
+        return self._index.get()
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        return self.index().search(query, limit)
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+# Attributes compared against Target on the dataset dashboards
+GROUPED_FIELDS = {
+    "gender_vs_dropout": "Gender",
+    "debtor_vs_dropout": "Debtor",
+    "tuition_vs_dropout": "Tuition fees up to date",
+}
+
+AGE_BUCKETS = ["<18", "18-22", "23-26", "27-30", "31+"]
+
+
+def _age_bucket_expression():
+    # Same ranges as before: upper bounds are inclusive, missing age counts as 0
+    age = {"$ifNull": ["$Age at enrollment", 0]}
+    return {"$switch": {
+        "branches": [
+            {"case": {"$lt": [age, 18]}, "then": "<18"},
+            {"case": {"$lte": [age, 22]}, "then": "18-22"},
+            {"case": {"$lte": [age, 26]}, "then": "23-26"},
+            {"case": {"$lte": [age, 30]}, "then": "27-30"},
+        ],
+        "default": "31+"
+    }}
+
+
+def dashboard_pipeline():
+    # Every number on the dashboard in one $facet pass over the collection
+    facets = {
+        "total": [{"$count": "count"}],
+        "dropout": [{"$match": {"Target": "Dropout"}}, {"$count": "count"}],
+        "age": [{"$group": {
+            "_id": {"bucket": _age_bucket_expression(), "Target": {"$ifNull": ["$Target", "Unknown"]}},
+            "count": {"$sum": 1}
+        }}],
+    }
+    for key, field in GROUPED_FIELDS.items():
+        facets[key] = [{"$group": {
+            "_id": {field: f"${field}", "Target": "$Target"},
+            "count": {"$sum": 1}
+        }}]
+    return [{"$facet": facets}]
+
+
+def compute_dashboard(collection):
+    result = next(collection.aggregate(dashboard_pipeline(), allowDiskUse=True), {})
+
+    def first_count(key):
+        rows = result.get(key) or []
+        return rows[0]["count"] if rows else 0
+
+    total_students = first_count("total")
+    dropout_students = first_count("dropout")
+    dropout_rate = (dropout_students / total_students) * 100 if total_students else 0
+
+    response = {
+        "total_students": total_students,
+        "dropout_students": dropout_students,
+        "dropout_rate": round(dropout_rate, 2),
+    }
+
+    for key, field in GROUPED_FIELDS.items():
+        grouped = defaultdict(lambda: defaultdict(int))
+        for row in result.get(key, []):
+            grouped[row["_id"][field]][row["_id"]["Target"]] += row["count"]
+        response[key] = grouped
+
+    age_vs_dropout = {bucket: {} for bucket in AGE_BUCKETS}
+    for row in result.get("age", []):
+        counts = age_vs_dropout[row["_id"]["bucket"]]
+        counts[row["_id"]["Target"]] = counts.get(row["_id"]["Target"], 0) + row["count"]
+    response["age_vs_dropout"] = age_vs_dropout
+
+    return response
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_TTL_SECONDS = 600
+
+
+class DashboardCache:
+    # LRU of computed dashboards keyed by (collection, data version), with a TTL backstop.
+    # Versions come from the CollectionRegistry poller, so a hit never goes to Mongo.
+
+    def __init__(self, registry, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.registry = registry
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, collection_name, compute):
+        key = (collection_name, self.registry.version_of(collection_name))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock so one slow collection does not block the others
+        value = compute()
+
+        with self._lock:
+            # Older versions of this collection can never be hit again
+            for stale in [k for k in self._entries if k[0] == collection_name and k != key]:
+                del self._entries[stale]
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, collection_name=None):
+        with self._lock:
+            if collection_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == collection_name]:
+                    del self._entries[key]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "versions": self.registry.versions()
+        }
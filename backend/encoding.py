@@ -0,0 +1,63 @@
+import numpy as np
+
+# Default encoding for values the label encoder has never seen
+UNKNOWN_CODE = 0
+
+
+def typed_column(values, classes):
+    # A list becomes a str or numeric array only when every value already has the kind of
+    # classes_, so it can take the binary search; anything mixed stays object dtype and is
+    # never coerced (e.g. 1 to "1")
+    values = list(values)
+    if classes.dtype.kind == "U" and all(type(value) is str for value in values):
+        return np.array(values, dtype=str)
+    if classes.dtype.kind in "iuf" and all(isinstance(value, (int, float, np.number)) for value in values):
+        typed = np.asarray(values)
+        if typed.dtype.kind in "iufb":
+            return typed
+    return np.asarray(values, dtype=object)
+
+
+class EncodingTables:
+    # Plain dict lookups built once from label_encoders.pkl. LabelEncoder.transform
+    # returns the position of the value in the sorted classes_, so each table maps
+    # class -> position and anything else -> UNKNOWN_CODE, same as safe_transform did.
+
+    def __init__(self, label_encoders):
+        self.tables = {}
+        self.classes = {}
+        for name, label_encoder in label_encoders.items():
+            classes = np.asarray(label_encoder.classes_)
+            self.classes[name] = classes
+            self.tables[name] = {value: index for index, value in enumerate(classes.tolist())}
+
+    def encode(self, name, value):
+        try:
+            return self.tables[name].get(value, UNKNOWN_CODE)
+        except TypeError:
+            return UNKNOWN_CODE  # Unhashable values can never be a known class
+
+    def encode_column(self, name, values):
+        # Encode a whole column at once for batch inputs
+        classes = self.classes[name]
+        if not isinstance(values, np.ndarray):
+            values = typed_column(values, classes)
+
+        # Same-kind arrays: binary search in the sorted classes_ instead of hashing each value
+        numeric = classes.dtype.kind in "iuf" and values.dtype.kind in "iufb"
+        strings = classes.dtype.kind == "U" and values.dtype.kind == "U"
+        if (numeric or strings) and len(classes):
+            positions = np.searchsorted(classes, values)
+            positions = np.clip(positions, 0, len(classes) - 1)
+            found = classes[positions] == values
+            return np.where(found, positions, UNKNOWN_CODE).astype(np.int64)
+
+        # Mixed or object columns fall back to the dict lookup per value
+        table = self.tables[name]
+        encoded = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values.tolist()):
+            try:
+                encoded[i] = table.get(value, UNKNOWN_CODE)
+            except TypeError:
+                encoded[i] = UNKNOWN_CODE
+        return encoded
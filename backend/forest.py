@@ -0,0 +1,105 @@
+import numpy as np
+
+# scikit-learn marks leaves with child index -1 and feature -2
+TREE_LEAF = -1
+
+
+class CompiledForest:
+    # A fitted tree ensemble flattened into contiguous arrays: every node of every tree
+    # has a feature, threshold, left/right child (leaves point at themselves) and a row of
+    # class fractions. Prediction walks all trees for all rows at once, one level per
+    # step, then averages the leaf rows like RandomForestClassifier.predict_proba.
+
+    def __init__(self, feature, threshold, left, right, leaf_value, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes = classes
+        self.is_leaf = left == np.arange(len(left))
+
+    @classmethod
+    def from_model(cls, model):
+        # RandomForestClassifier / ExtraTreesClassifier, or a single DecisionTreeClassifier.
+        # Boosted ensembles keep regression trees (no classes_) and are rejected here.
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None:
+            estimators = [model]
+        trees = [getattr(estimator, "tree_", None) for estimator in estimators]
+        if not trees or any(tree is None for tree in trees) or not all(hasattr(e, "classes_") for e in estimators):
+            raise TypeError(f"{type(model).__name__} is not a fitted tree classifier")
+        if getattr(model, "n_outputs_", 1) != 1 or not hasattr(model, "classes_"):
+            raise TypeError("Only single-output classifiers can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == TREE_LEAF
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+
+            # Per-node class fractions, as DecisionTreeClassifier.predict_proba normalizes them
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            values.append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            leaf_value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            classes=np.asarray(model.classes_),
+        )
+
+    def _leaves(self, X):
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            if self.is_leaf[nodes].all():
+                break
+        return nodes
+
+    def _as_matrix(self, X):
+        # The trees were fitted on float32 inputs; comparing float32 values keeps splits
+        # that fall exactly on a threshold identical to scikit-learn
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        return X.astype(np.float64)
+
+    def predict_proba(self, X):
+        return self.leaf_value[self._leaves(self._as_matrix(X))].sum(axis=1) / len(self.roots)
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def boundary_rows(forest, n_features, rows, seed=0):
+    # Inputs sitting on, just below and just above the split thresholds, where a compiled
+    # forest is most likely to disagree with the original
+    rng = np.random.default_rng(seed)
+    by_feature = [forest.threshold[(forest.feature == f) & ~forest.is_leaf] for f in range(n_features)]
+
+    X = np.zeros((rows, n_features))
+    for f, thresholds in enumerate(by_feature):
+        if len(thresholds) == 0:
+            X[:, f] = rng.normal(size=rows)
+            continue
+        picked = rng.choice(thresholds, size=rows)
+        X[:, f] = picked + rng.choice([-1e-3, 0.0, 1e-3, -1.0, 1.0], size=rows)
+    return X
@@ -0,0 +1,200 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from flask import request
+from pymongo import monitoring
+
+# Upper bounds in seconds; +Inf is implicit
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMAND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Mongo commands issued by one request: a route that loops over queries shows up in the high buckets
+COMMANDS_PER_REQUEST_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+# Route template of the request running in this context; commands outside a request get "none"
+_current = contextvars.ContextVar("metrics_request", default=None)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        copy = Histogram(self.bounds)
+        copy.counts, copy.sum, copy.count = list(self.counts), self.sum, self.count
+        return copy
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_labels(labels, le=le)} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}" if pairs else ""
+
+
+class Metrics:
+    # Histograms and counters keyed by label tuples, rendered in the Prometheus text format
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = {}
+        self.commands_per_request = {}
+        self.command_latency = {}
+        self.command_documents = {}
+        self.command_failures = {}
+
+    def _observe(self, table, key, bounds, value):
+        with self._lock:
+            histogram = table.get(key)
+            if histogram is None:
+                histogram = table[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def observe_request(self, route, method, status, seconds, commands):
+        self._observe(self.request_latency, (("route", route), ("method", method), ("status", status)),
+                      REQUEST_BUCKETS, seconds)
+        self._observe(self.commands_per_request, (("route", route), ("method", method)),
+                      COMMANDS_PER_REQUEST_BUCKETS, commands)
+
+    def observe_command(self, route, command, collection, seconds, documents):
+        key = (("route", route), ("command", command), ("collection", collection))
+        self._observe(self.command_latency, key, COMMAND_BUCKETS, seconds)
+        with self._lock:
+            self.command_documents[key] = self.command_documents.get(key, 0) + documents
+
+    def count_failure(self, route, command, collection):
+        key = (("route", route), ("command", command), ("collection", collection))
+        with self._lock:
+            self.command_failures[key] = self.command_failures.get(key, 0) + 1
+
+    def render(self):
+        def histograms(table):
+            return {key: histogram.copy() for key, histogram in table.items()}
+
+        # Copied under the lock, so rendering never sees a half-applied observation
+        with self._lock:
+            tables = [
+                ("anvesha_http_request_duration_seconds", "histogram", "Request latency by route and status",
+                 histograms(self.request_latency)),
+                ("anvesha_http_request_mongo_commands", "histogram", "MongoDB commands issued per request",
+                 histograms(self.commands_per_request)),
+                ("anvesha_mongo_command_duration_seconds", "histogram", "MongoDB command latency by issuing route",
+                 histograms(self.command_latency)),
+                ("anvesha_mongo_command_documents_returned_total", "counter",
+                 "Documents returned in cursor batches to each route", dict(self.command_documents)),
+                ("anvesha_mongo_command_failures_total", "counter", "Failed MongoDB commands by issuing route",
+                 dict(self.command_failures)),
+            ]
+
+        lines = []
+        for name, kind, description, table in tables:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(table.items()):
+                if kind == "histogram":
+                    lines.extend(value.samples(name, labels))
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def returned_documents(reply):
+    # Length of the cursor batch in a find/aggregate/getMore reply, read off the decoded reply
+    # rather than re-encoding it, which would cost as much as the reply is large
+    cursor = reply.get("cursor") if isinstance(reply, dict) else None
+    if not isinstance(cursor, dict):
+        return 0
+    batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+    return len(batch) if isinstance(batch, list) else 0
+
+
+class CommandMetrics(monitoring.CommandListener):
+    # Attributes every command to the route whose request issued it. Listener callbacks run
+    # on the issuing thread, so the route is read from the request's context variable.
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._pending = {}
+
+    def started(self, event):
+        state = _current.get()
+        if state is not None:
+            state["commands"] += 1
+        collection = event.command.get(event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = (
+            state["route"] if state is not None else "none",
+            collection if isinstance(collection, str) else "",
+        )
+
+    def _finish(self, event):
+        return self._pending.pop((event.connection_id, event.request_id), ("none", ""))
+
+    def succeeded(self, event):
+        route, collection = self._finish(event)
+        self.registry.observe_command(route, event.command_name, collection, event.duration_micros / 1e6,
+                                      returned_documents(event.reply))
+
+    def failed(self, event):
+        route, collection = self._finish(event)
+        self.registry.count_failure(route, event.command_name, collection)
+
+
+command_metrics = CommandMetrics(metrics)
+
+
+def register_command_listener():
+    # Must run before the MongoClient is created; clients pick up global listeners at construction
+    monitoring.register(command_metrics)
+
+
+def install_request_metrics(app):
+    # Latency runs until the view returns its response, so streamed bodies are timed up to
+    # the point where streaming starts
+
+    @app.before_request
+    def _start_request_timer():
+        rule = request.url_rule
+        state = {"route": rule.rule if rule is not None else "unmatched", "start": time.perf_counter(), "commands": 0}
+        state["token"] = _current.set(state)
+
+    @app.after_request
+    def _record_request(response):
+        state = _current.get()
+        if state is not None:
+            metrics.observe_request(state["route"], request.method, response.status_code,
+                                    time.perf_counter() - state["start"], state["commands"])
+        return response
+
+    @app.teardown_request
+    def _clear_request(exception=None):
+        state = _current.get()
+        if state is not None:
+            try:
+                _current.reset(state["token"])
+            except ValueError:
+                _current.set(None)  # Torn down from a different context than it was set in
@@ -0,0 +1,242 @@
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from collection_registry import DEFAULT_POLL_SECONDS
+from encoding import EncodingTables
+from forest import CompiledForest, boundary_rows
+
+MODEL_FILE = "dropout_risk_model.pkl"
+ENCODERS_FILE = "label_encoders.pkl"
+
+# Layout: models/<files> is the baseline, models/versions/<version>/<files> are rollouts
+DEFAULT_MODEL_DIR = os.getenv("MODEL_DIR", "models")
+BASELINE_VERSION = os.getenv("MODEL_VERSION", "baseline")
+
+# How many inactive versions stay loaded for quick rollback
+MAX_INACTIVE_VERSIONS = 2
+
+# {_id: "active", version, activatedOn}: the version every worker serves, polled like dataset_versions
+MODEL_SETTINGS_COLLECTION = "model_settings"
+ACTIVE_MODEL_ID = "active"
+
+# Tree ensembles are served from a compiled copy unless COMPILED_INFERENCE=0; the copy is
+# only used after it agreed with the original on this many threshold-boundary rows
+COMPILED_INFERENCE = os.getenv("COMPILED_INFERENCE", "1") != "0"
+CONFORMANCE_ROWS = 2000
+
+
+class ModelVersion:
+    # One fitted model with the encoders it was trained with
+
+    def __init__(self, version, model, label_encoders, path):
+        self.version = version
+        self.model = model
+        self.label_encoders = label_encoders
+        self.encoding_tables = EncodingTables(label_encoders)
+        self.path = path
+        self.loaded_on = datetime.utcnow()
+        self.n_features = getattr(model, "n_features_in_", 23)
+        self.compiled = None
+
+    def compile(self, rows=CONFORMANCE_ROWS):
+        # Keeps the compiled forest only if it predicts exactly what the model does
+        try:
+            compiled = CompiledForest.from_model(self.model)
+        except (TypeError, AttributeError, ValueError) as e:
+            print(f"[❌] Model {self.version} not compiled: {e}")
+            return False
+
+        X = boundary_rows(compiled, self.n_features, rows)
+        if not np.array_equal(compiled.predict(X), self.model.predict(X)):
+            print(f"[❌] Compiled model {self.version} disagrees with the original; using scikit-learn")
+            return False
+        self.compiled = compiled
+        return True
+
+    def predict(self, features):
+        # Encoded riskLabel per row; a single feature vector is treated as one row
+        if self.compiled is not None:
+            return self.compiled.predict(features)
+        features = np.asarray(features, dtype=np.float64)
+        return self.model.predict(features[None, :] if features.ndim == 1 else features)
+
+    def warm_up(self):
+        # Run a few predictions so the first real request does not pay for lazy setup
+        for rows in (1, 32):
+            predictions = self.predict(np.zeros((rows, self.n_features)))
+            self.label_encoders['riskLabel'].inverse_transform(predictions)
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loadedOn": self.loaded_on.isoformat(),
+            "compiled": self.compiled is not None
+        }
+
+
+def load_model_version(version, directory):
+    model = joblib.load(os.path.join(directory, MODEL_FILE))
+    label_encoders = joblib.load(os.path.join(directory, ENCODERS_FILE))
+    model_version = ModelVersion(version, model, label_encoders, directory)
+    if COMPILED_INFERENCE:
+        model_version.compile()
+    model_version.warm_up()
+    return model_version
+
+
+class ModelRegistry:
+    # Holds several loaded versions; requests read `active()` once and use that snapshot,
+    # so swapping the active version never mixes two models inside one request.
+    # With a db, the chosen version is stored in model_settings and every worker polls it,
+    # so an activation or rollback reaches all workers and survives restarts.
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, db=None, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.model_dir = model_dir
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self._versions = {}
+        self._active = None
+        self._lock = threading.Lock()
+        self._poller = None
+        self._unloadable = None  # Stored version that failed to load here; not retried every poll
+
+    def active(self):
+        self.ensure_started()
+        return self._active
+
+    def stored_version(self):
+        if self.db is None:
+            return None
+        doc = self.db[MODEL_SETTINGS_COLLECTION].find_one({"_id": ACTIVE_MODEL_ID}, {"version": 1})
+        return doc.get("version") if doc else None
+
+    def ensure_started(self):
+        # Started lazily so each forked worker gets its own thread
+        if self.db is None or (self._poller is not None and self._poller.is_alive()):
+            return
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll, daemon=True)
+                self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                version = self.stored_version()
+                active = self._active
+                if version and version != self._unloadable and (active is None or active.version != version):
+                    try:
+                        self.activate(version)
+                    except KeyError:
+                        self._unloadable = version
+                        raise
+            except Exception as e:
+                print(f"[❌] Active model sync failed: {e}")
+
+    def versions(self):
+        with self._lock:
+            active = self._active
+            loaded = list(self._versions.values())
+        return [dict(v.describe(), active=(v is active)) for v in loaded]
+
+    def available_versions(self):
+        # Versions on disk: the baseline plus every complete directory under models/versions
+        found = {}
+        if os.path.exists(os.path.join(self.model_dir, MODEL_FILE)):
+            found[BASELINE_VERSION] = self.model_dir
+
+        versions_dir = os.path.join(self.model_dir, "versions")
+        if os.path.isdir(versions_dir):
+            for name in os.listdir(versions_dir):
+                directory = os.path.join(versions_dir, name)
+                if os.path.exists(os.path.join(directory, MODEL_FILE)) and os.path.exists(os.path.join(directory, ENCODERS_FILE)):
+                    found[name] = directory
+        return found
+
+    def load(self, version):
+        # Load and warm up outside the lock; only the bookkeeping is serialized
+        if version in self._versions:
+            return self._versions[version]
+
+        directory = self.available_versions().get(version)
+        if directory is None:
+            raise KeyError(f"Model version '{version}' not found in {self.model_dir}")
+
+        model_version = load_model_version(version, directory)
+        with self._lock:
+            self._versions.setdefault(version, model_version)
+            return self._versions[version]
+
+    def activate(self, version):
+        model_version = self.load(version)
+        with self._lock:
+            previous = self._active
+            self._active = model_version  # Single reference swap, atomic for readers
+            self._evict_inactive()
+        print(f"[✅] Active model version: {version}" + (f" (was {previous.version})" if previous else ""))
+        return model_version
+
+    def reload(self, version=None, publish=False):
+        # Activate the given version, or the most recently written one on disk. `publish`
+        # stores it as the active version, which the other workers then pick up.
+        if version is None:
+            available = self.available_versions()
+            if not available:
+                raise KeyError(f"No model versions found in {self.model_dir}")
+            version = max(available, key=lambda name: os.path.getmtime(os.path.join(available[name], MODEL_FILE)))
+        model_version = self.activate(version)
+        if publish and self.db is not None:
+            self.db[MODEL_SETTINGS_COLLECTION].update_one(
+                {"_id": ACTIVE_MODEL_ID},
+                {"$set": {"version": version}, "$currentDate": {"activatedOn": True}},
+                upsert=True
+            )
+        return model_version
+
+    def load_initial(self, fallback_version=None):
+        # Startup: the stored version, else `fallback_version`, else the newest on disk
+        stored = self.stored_version()
+        if stored:
+            try:
+                return self.reload(stored)
+            except KeyError as e:
+                print(f"[❌] Stored model version unavailable: {e}")
+                self._unloadable = stored
+        return self.reload(fallback_version)
+
+    def _evict_inactive(self):
+        inactive = [v for v in self._versions.values() if v is not self._active]
+        inactive.sort(key=lambda v: v.loaded_on)
+        while len(inactive) > MAX_INACTIVE_VERSIONS:
+            evicted = inactive.pop(0)
+            del self._versions[evicted.version]
+
+    def install_reload_signal(self, signum=None):
+        # `kill -USR2 <worker pid>` loads and activates the newest version in the background,
+        # and publishes it so the other workers follow
+        signum = signum or getattr(signal, "SIGUSR2", None)
+        if signum is None:
+            return False  # Not available on Windows
+
+        def handle(_signum, _frame):
+            threading.Thread(target=self._reload_quietly, daemon=True).start()
+
+        try:
+            signal.signal(signum, handle)
+        except ValueError:
+            return False  # Only the main thread may install signal handlers
+        return True
+
+    def _reload_quietly(self):
+        try:
+            self.reload(publish=True)
+        except Exception as e:
+            print(f"[❌] Model reload failed: {e}")
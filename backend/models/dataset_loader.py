@@ -1,23 +1,155 @@
 import pandas as pd
-from pymongo import MongoClient
+import numpy as np
+import itertools
+import json
 import os
+import shutil
+import sys
+import tempfile
 from dotenv import load_dotenv
 
+# Shared backend helpers live one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from collection_registry import VERSIONS_COLLECTION, CollectionRegistry  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
 # Load environment variables from .env file
 load_dotenv()
 
-def load_dataset(dataset_name):
-    client = MongoClient(os.getenv("MongoURI"))
-    db = client["anvesha"]
+# Columnar cache: <cache dir>/<dataset>/<fingerprint>/ holds one .npy file per column
+# plus meta.json with the column order and dtypes, so a column subset only reads its files
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dataset_cache"))
+FETCH_BATCH_SIZE = 5000
+# Longer strings are kept as a pickled object column rather than a fixed-width one
+MAX_FIXED_WIDTH = 256
+
+# One registry per process: collection names are checked without a round trip per call
+_collection_registry = None
+
+
+def get_collection_registry(db):
+    global _collection_registry
+    if _collection_registry is None:
+        _collection_registry = CollectionRegistry(db)
+    return _collection_registry
+
+
+def dataset_fingerprint(db, dataset_name):
+    # Loaders bump dataset_versions on every reload; the count catches collections loaded without one
+    entry = db[VERSIONS_COLLECTION].find_one({"_id": dataset_name}, {"version": 1}) or {}
+    return f"v{entry.get('version', 0)}-n{db[dataset_name].estimated_document_count()}"
+
+
+def fetch_dataset(collection, columns=None, batch_size=FETCH_BATCH_SIZE):
+    # Builds the frame batch by batch so the full list of dicts never exists at once; with
+    # `columns` only those fields are sent by the server
+    projection = {"_id": 0}
+    if columns:
+        projection.update({column: 1 for column in columns})
+    cursor = collection.find({}, projection).batch_size(batch_size)
+    frames = []
+    while True:
+        batch = list(itertools.islice(cursor, batch_size))
+        if not batch:
+            break
+        frames.append(pd.DataFrame(batch))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def _is_string_column(values):
+    return all(value is None or isinstance(value, str) or (isinstance(value, float) and np.isnan(value)) for value in values)
+
+
+def _write_column(directory, index, series):
+    # Returns the column's meta entry; numeric, bool and datetime columns are stored as is
+    path = os.path.join(directory, f"col_{index}.npy")
+    values = series.to_numpy()
+    if values.dtype != object:
+        np.save(path, values)
+        return {"name": series.name, "kind": "native", "dtype": str(values.dtype)}
+
+    missing = series.isna().to_numpy()
+    if _is_string_column(values):
+        strings = np.where(missing, "", values).astype(str)
+        if strings.dtype.itemsize // 4 <= MAX_FIXED_WIDTH:
+            np.save(path, strings)
+            np.save(os.path.join(directory, f"col_{index}_missing.npy"), missing)
+            return {"name": series.name, "kind": "string", "dtype": str(strings.dtype)}
 
+    np.save(path, values, allow_pickle=True)
+    return {"name": series.name, "kind": "object", "dtype": "object"}
+
+
+def _read_column(directory, index, meta):
+    path = os.path.join(directory, f"col_{index}.npy")
+    if meta["kind"] == "native":
+        return np.load(path)
+    if meta["kind"] == "string":
+        values = np.load(path).astype(object)
+        values[np.load(os.path.join(directory, f"col_{index}_missing.npy"))] = np.nan
+        return values
+    return np.load(path, allow_pickle=True)
+
+
+def write_cache(dataset_name, fingerprint, df):
+    dataset_dir = os.path.join(CACHE_DIR, dataset_name)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    # Written to a temporary directory and renamed, so readers never see a partial cache
+    staging = tempfile.mkdtemp(dir=dataset_dir)
+    columns = [_write_column(staging, index, df[name]) for index, name in enumerate(df.columns)]
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({"fingerprint": fingerprint, "rows": len(df), "columns": columns}, f)
+
+    target = os.path.join(dataset_dir, fingerprint)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    # Older fingerprints of this dataset can never be read again
+    for entry in os.listdir(dataset_dir):
+        if entry != fingerprint:
+            shutil.rmtree(os.path.join(dataset_dir, entry), ignore_errors=True)
+
+
+def read_cache(dataset_name, fingerprint, columns=None):
+    directory = os.path.join(CACHE_DIR, dataset_name, fingerprint)
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    wanted = set(columns) if columns else None
+    data = {
+        column["name"]: _read_column(directory, index, column)
+        for index, column in enumerate(meta["columns"])
+        if wanted is None or column["name"] in wanted
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]))
+
+
+def load_dataset(dataset_name, columns=None, refresh=False):
+    db = get_db()
 
     # Check if collection exists
-    if dataset_name not in db.list_collection_names():
+    if not get_collection_registry(db).exists(dataset_name):
         print(f"[❌] Collection '{dataset_name}' not found.")
         return pd.DataFrame()
 
-    collection = db[dataset_name]
-    data = list(collection.find({}, {"_id": 0}))  # exclude _id
-    df = pd.DataFrame(data)
+    fingerprint = dataset_fingerprint(db, dataset_name)
+    df = None if refresh else read_cache(dataset_name, fingerprint, columns)
+    if df is not None:
+        print(f"[✅] Loaded '{dataset_name}' dataset from cache with shape: {df.shape}")
+        return df
+
+    # Only full loads are cached; a column subset is fetched with a projection
+    df = fetch_dataset(db[dataset_name], columns)  # exclude _id
+    if not df.empty and not columns:
+        try:
+            write_cache(dataset_name, fingerprint, df)
+        except OSError as e:
+            print(f"[❌] Could not cache '{dataset_name}': {e}")
     print(f"[✅] Loaded '{dataset_name}' dataset with shape: {df.shape}")
-    return df
\ No newline at end of file
+    return df
@@ -1,20 +1,31 @@
-from pymongo import MongoClient
 from datetime import datetime
 import os
+import sys
 from dotenv import load_dotenv
 
+# Shared backend helpers live one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mongo_client import get_db  # noqa: E402
+from report_storage import store_report_body  # noqa: E402
+
 # Load environment variables from .env file
 load_dotenv()
 
 def save_html_report_to_mongo(report_html, dataset_name: str, metadata=None):
-    client = MongoClient(os.getenv("MongoURI"))
-    db = client["anvesha"]
+    db = get_db()
     collection = db["reports"]
 
+    generated_on = datetime.now()
+
+    # The HTML goes to GridFS compressed; the report document only points at it
+    body_id, body_size = store_report_body(db, report_html, f"{dataset_name}-{generated_on:%Y%m%d%H%M%S}.html.gz")
+
     report_doc = {
         "dataset": dataset_name,  # 🔥 Save dataset info here
-        "generated_on": datetime.now(),
-        "html": report_html,
+        "generated_on": generated_on,
+        "body_id": body_id,
+        "body_encoding": "gzip",
+        "body_size": body_size,
         "metadata": metadata or {}
     }
 
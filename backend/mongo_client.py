@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from pymongo import MongoClient, monitoring
+
+# Overridable so benchmarks can run the app against a scratch database
+DATABASE_NAME = os.getenv("MONGO_DATABASE", "anvesha")
+DEFAULT_URI = "mongodb://localhost:27017/"
+
+# Environment variable -> MongoClient option. Unset variables keep the driver defaults
+# (100 connections per server, no compression, primary reads).
+CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),
+    "MONGO_COMPRESSORS": ("compressors", str),  # e.g. "zstd,snappy,zlib"
+    "MONGO_APP_NAME": ("appname", str),
+}
+
+
+def client_options_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    options = {}
+    for variable, (option, cast) in CLIENT_OPTIONS.items():
+        value = environ.get(variable)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    # Connection pool counters per server, fed by the driver's CMAP events
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = defaultdict(lambda: {
+            "open": 0, "checkedOut": 0, "maxCheckedOut": 0,
+            "checkouts": 0, "checkoutFailures": 0, "poolCleared": 0,
+            "waitSecondsTotal": 0.0, "waitSecondsMax": 0.0,
+        })
+        self._started = {}
+
+    def _server(self, event):
+        return self._servers["%s:%s" % event.address]
+
+    def snapshot(self):
+        with self._lock:
+            servers = {address: dict(stats) for address, stats in self._servers.items()}
+        for stats in servers.values():
+            stats["waitSecondsAvg"] = stats["waitSecondsTotal"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return servers
+
+    def _wait_seconds(self, event):
+        # Recent drivers time the checkout themselves; otherwise measure from the start event
+        duration = getattr(event, "duration", None)
+        started = self._started.pop((event.address, threading.get_ident()), None)
+        if duration is not None:
+            return duration
+        return time.monotonic() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._started[(event.address, threading.get_ident())] = time.monotonic()
+
+    def connection_checked_out(self, event):
+        wait = self._wait_seconds(event)
+        with self._lock:
+            stats = self._server(event)
+            stats["checkouts"] += 1
+            stats["checkedOut"] += 1
+            stats["maxCheckedOut"] = max(stats["maxCheckedOut"], stats["checkedOut"])
+            stats["waitSecondsTotal"] += wait
+            stats["waitSecondsMax"] = max(stats["waitSecondsMax"], wait)
+
+    def connection_check_out_failed(self, event):
+        self._wait_seconds(event)
+        with self._lock:
+            self._server(event)["checkoutFailures"] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._server(event)
+            stats["checkedOut"] = max(stats["checkedOut"] - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event)["open"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._server(event)
+            stats["open"] = max(stats["open"] - 1, 0)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event)["poolCleared"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
+
+# One client per URI and option set for the whole process, shared by every module
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(uri=None, **overrides):
+    uri = uri or os.getenv("MongoURI") or DEFAULT_URI
+    options = dict(client_options_from_env(), **overrides)
+    key = (uri, tuple(sorted(options.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = MongoClient(uri, event_listeners=[pool_metrics], **options)
+                _clients[key] = client
+    return client
+
+
+def get_db(name=DATABASE_NAME, uri=None, **overrides):
+    return get_client(uri, **overrides)[name]
+
+
+def pool_stats():
+    # Configured pool limits next to the live counters, for sizing against the worker count
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {
+        "clients": [
+            {
+                "maxPoolSize": client.options.pool_options.max_pool_size,
+                "minPoolSize": client.options.pool_options.min_pool_size,
+                "readPreference": client.read_preference.name,
+            }
+            for client in clients
+        ],
+        "servers": pool_metrics.snapshot(),
+    }
@@ -0,0 +1,213 @@
+import calendar
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from activity import is_enrolled, load_course_activities, record_daily_activity, start_of_day
+
+# performance_analytics.activitySummary is kept up to date on every activity write:
+#   {"courses": {<course key>: {logId, courseId, courseTitle, origin, joinLink,
+#                                lastAccessed, days: {"YYYY-MM-DD": minutes}}}}
+# GET /api/performance and the student dashboard are shaped from it without touching the logs.
+SUMMARY_FIELD = "activitySummary"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def field_key(value):
+    # Course ids become field names, so keep them free of path separators
+    return str(value).replace(".", "．").replace("$", "＄")
+
+
+def day_key(date):
+    # "YYYY-MM-DD", or None for a log date that cannot be read as one
+    if isinstance(date, datetime):
+        return date.strftime(DAY_FORMAT)
+    try:
+        return datetime.strptime(str(date)[:10], DAY_FORMAT).strftime(DAY_FORMAT)
+    except ValueError:
+        return None
+
+
+def parse_day(key):
+    try:
+        return datetime.strptime(key, DAY_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def course_summary_entry(activity):
+    days = {}
+    for log in activity.get("activityLogs", []):
+        key = day_key(log.get("date"))
+        if key is None:
+            continue  # Undated logs never had a day to count towards
+        days[key] = days.get(key, 0) + log.get("durationMinutes", 0)
+
+    return {
+        "logId": activity.get("_id"),
+        "courseId": activity.get("courseId", "unknown"),
+        "courseTitle": activity.get("courseTitle", "Unknown"),
+        "origin": activity.get("origin"),
+        "joinLink": activity.get("joinLink"),
+        "lastAccessed": activity.get("lastAccessed"),
+        "days": days
+    }
+
+
+def build_summary(activities):
+    return {"courses": {field_key(a.get("courseId", "unknown")): course_summary_entry(a) for a in activities}}
+
+
+def rebuild_performance_summary(db, student_obj_id):
+    # Full recompute from course_activity_logs, for backfills and repairs
+    activities = load_course_activities(db, student_obj_id)
+    summary = build_summary(activities)
+    db.performance_analytics.update_one(
+        {"studentId": student_obj_id},
+        {"$set": {SUMMARY_FIELD: summary, "lastUpdated": datetime.utcnow()}},
+        upsert=True
+    )
+    return summary, len(activities)
+
+
+def record_course_added(db, student_obj_id, activity):
+    # Only creates the entry: activity written for the course in the meantime already put
+    # it there (through a rebuild), and replacing it would drop those minutes
+    entry = course_summary_entry(activity)
+    course_path = f"{SUMMARY_FIELD}.courses.{field_key(entry['courseId'])}"
+    result = db.performance_analytics.update_one(
+        {"studentId": student_obj_id, SUMMARY_FIELD: {"$exists": True}, course_path: {"$exists": False}},
+        {"$set": {course_path: entry, "lastUpdated": datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        # Student predates the summary, or activity raced ahead of this: build it from the logs
+        rebuild_performance_summary(db, student_obj_id)
+
+
+def record_activity(db, student_obj_id, course_id, day, duration, accessed_on):
+    # False when the summary has no entry for the course: not joined, or not built yet
+    course_path = f"{SUMMARY_FIELD}.courses.{field_key(course_id)}"
+    result = db.performance_analytics.update_one(
+        {"studentId": student_obj_id, course_path: {"$exists": True}},
+        {
+            "$inc": {f"{course_path}.days.{day_key(day)}": duration},
+            "$set": {f"{course_path}.lastAccessed": accessed_on, "lastUpdated": accessed_on}
+        }
+    )
+    return result.matched_count > 0
+
+
+def record_course_activity(db, student_obj_id, course_id, duration, now):
+    # One summary write and one bucket write. Every joined course has a summary entry, so a
+    # matched summary update is also the enrollment check; the enrollment is only read for
+    # students whose summary lacks the course. Returns False for courses never joined.
+    if record_activity(db, student_obj_id, course_id, start_of_day(now), duration, now):
+        record_daily_activity(db, student_obj_id, course_id, duration, now)
+        return True
+
+    if not is_enrolled(db, student_obj_id, course_id):
+        return False
+    record_daily_activity(db, student_obj_id, course_id, duration, now)
+    # Student predates the summary; the buckets now include this write
+    rebuild_performance_summary(db, student_obj_id)
+    return True
+
+
+def record_activity_bulk(db, entries, accessed_on):
+    # entries: (studentId, courseId, day, minutes); one $inc/$set per student in one bulk_write.
+    # Same rules as record_course_activity: minutes only go into existing course entries, and
+    # students whose summary lacks one of the courses are rebuilt from the buckets instead.
+    course_keys = {(entry[0], field_key(entry[1])) for entry in entries}
+    student_ids = list({student_obj_id for student_obj_id, _ in course_keys})
+    projection = {f"{SUMMARY_FIELD}.courses.{key}.courseId": 1 for _, key in course_keys}
+    projection["studentId"] = 1
+    present = set()
+    for doc in db.performance_analytics.find({"studentId": {"$in": student_ids}}, projection):
+        for key in doc.get(SUMMARY_FIELD, {}).get("courses", {}):
+            present.add((doc["studentId"], key))
+    rebuild = {student_obj_id for student_obj_id, key in course_keys if (student_obj_id, key) not in present}
+
+    updates = {}
+    for student_obj_id, course_id, day, minutes in entries:
+        if student_obj_id in rebuild:
+            continue
+        course_filter, inc, fields = updates.setdefault(student_obj_id, ({}, {}, {"lastUpdated": accessed_on}))
+        course_path = f"{SUMMARY_FIELD}.courses.{field_key(course_id)}"
+        course_filter[course_path] = {"$exists": True}
+        day_path = f"{course_path}.days.{day_key(day)}"
+        inc[day_path] = inc.get(day_path, 0) + minutes
+        fields[f"{course_path}.lastAccessed"] = accessed_on
+
+    if updates:
+        db.performance_analytics.bulk_write([
+            UpdateOne(dict(course_filter, studentId=student_obj_id), {"$inc": inc, "$set": fields})
+            for student_obj_id, (course_filter, inc, fields) in updates.items()
+        ], ordered=False)
+
+    # The buckets already include these writes
+    for student_obj_id in rebuild:
+        rebuild_performance_summary(db, student_obj_id)
+
+
+def performance_view(student_obj_id, summary, last_updated=None, now=None):
+    # Same shape GET /api/performance has always returned
+    now = now or datetime.utcnow()
+    subject_scores = []
+    time_spent = []
+    daily_progress = {}
+    course_activity_logs = []
+
+    for course in summary.get("courses", {}).values():
+        course_title = course.get("courseTitle", "Unknown")
+        # Day keys written before they were validated are skipped rather than failing the view
+        parsed = ((day, parse_day(day), minutes) for day, minutes in course.get("days", {}).items())
+        days = sorted((day, date, minutes) for day, date, minutes in parsed if date is not None)
+        logs = [{"date": date, "durationMinutes": minutes} for _, date, minutes in days]
+
+        # Simulated score based on latest activity duration
+        latest_log = logs[-1] if logs else {}
+        subject_scores.append({
+            "subjectId": course.get("courseId", "unknown"),
+            "subject": course_title,
+            "score": float(70 + (latest_log.get("durationMinutes", 0) % 30))
+        })
+
+        time_spent.append({
+            "subject": course_title,
+            "minutes": sum(minutes for _, _, minutes in days)
+        })
+
+        for day, _, minutes in days:
+            daily_progress[day] = daily_progress.get(day, 0) + minutes
+
+        course_activity_logs.append({
+            "_id": str(course.get("logId")),
+            "studentId": str(student_obj_id),
+            "courseId": course.get("courseId"),
+            "courseTitle": course_title,
+            "origin": course.get("origin"),
+            "joinLink": course.get("joinLink"),
+            "activityLogs": logs,
+            "lastAccessed": course.get("lastAccessed")
+        })
+
+    daily_progress_arr = [
+        {"date": day, "progress": minutes // 10}  # Simulated progress
+        for day, minutes in sorted(daily_progress.items())
+    ]
+
+    # Attendance: active days out of the days in the current month
+    attendance = {
+        "totalDays": calendar.monthrange(now.year, now.month)[1],
+        "presentDays": len(daily_progress)
+    }
+
+    return {
+        "studentId": str(student_obj_id),
+        "subjectScores": subject_scores,
+        "timeSpent": time_spent,
+        "dailyProgress": daily_progress_arr,
+        "attendance": attendance,
+        "lastUpdated": last_updated or now,
+        "courseActivityLogs": course_activity_logs
+    }
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 10000
+# How long a worker trusts its last prediction for a student without re-reading the inputs.
+# Edits made through this worker invalidate at once; this bounds staleness across workers.
+DEFAULT_STUDENT_TTL_SECONDS = 60
+# PREDICTION_CACHE_PERSIST=0 stops storing the feature hash next to the stored risk label
+PERSIST_FEATURE_HASH = os.getenv("PREDICTION_CACHE_PERSIST", "1") != "0"
+
+
+def feature_hash(features):
+    # Stable across processes: the exact float64 bytes of the encoded feature vector
+    values = np.asarray(features)
+    if values.dtype.kind in "biuf":
+        payload = values.astype(np.float64).tobytes()
+    else:
+        payload = repr(values.tolist()).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def stored_prediction_update(risk_score, label, model_version, key):
+    # Update for performance_analytics. /model_predict skips the model when the stored
+    # featureHash matches, so every write of a label either stores its hash or removes it.
+    fields = {"riskScore": risk_score, "riskLabel": label, "modelVersion": model_version}
+    if PERSIST_FEATURE_HASH:
+        fields["featureHash"] = key
+        return {"$set": fields}
+    return {"$set": fields, "$unset": {"featureHash": ""}}
+
+
+def _student_key(student_id):
+    # ObjectId or its hex string from a URL, in either case
+    return str(student_id).lower()
+
+
+class PredictionCache:
+    # Two LRUs for /model_predict:
+    #   (model version, feature hash) -> label, which skips the model for identical inputs
+    #   student id -> last response, which skips the Mongo reads as well while it is fresh.
+    # A student entry only counts for the model version and calendar day it was computed on,
+    # since daysSinceRegistration is one of the features.
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, student_ttl_seconds=DEFAULT_STUDENT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.student_ttl_seconds = student_ttl_seconds
+        self.student_hits = 0
+        self.feature_hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+        self._labels = OrderedDict()
+        self._students = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def get_student(self, student_id, model_version):
+        student_id = _student_key(student_id)
+        with self._lock:
+            entry = self._students.get(student_id)
+            if entry is None:
+                return None
+            version, day, expires, result = entry
+            if version != model_version or day != date.today() or expires <= time.monotonic():
+                del self._students[student_id]
+                return None
+            self._students.move_to_end(student_id)
+            self.student_hits += 1
+            return result
+
+    def put_student(self, student_id, model_version, result):
+        with self._lock:
+            entry = (model_version, date.today(), time.monotonic() + self.student_ttl_seconds, result)
+            self._put(self._students, _student_key(student_id), entry)
+
+    def get_label(self, model_version, key):
+        with self._lock:
+            label = self._labels.get((model_version, key))
+            if label is not None:
+                self._labels.move_to_end((model_version, key))
+                self.feature_hits += 1
+            return label
+
+    def put_label(self, model_version, key, label):
+        with self._lock:
+            self._put(self._labels, (model_version, key), label)
+
+    def count_stored_hit(self):
+        with self._lock:
+            self.stored_hits += 1
+
+    def count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def invalidate_student(self, student_id):
+        with self._lock:
+            self._students.pop(_student_key(student_id), None)
+
+    def invalidate_students(self, student_ids):
+        with self._lock:
+            for student_id in student_ids:
+                self._students.pop(_student_key(student_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._labels.clear()
+            self._students.clear()
+
+    def stats(self):
+        return {
+            "students": len(self._students),
+            "featureVectors": len(self._labels),
+            "studentHits": self.student_hits,
+            "featureHits": self.feature_hits,
+            "storedHits": self.stored_hits,
+            "misses": self.misses
+        }
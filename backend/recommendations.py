@@ -0,0 +1,202 @@
+import heapq
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from collection_registry import VersionedIndex
+
+DEFAULT_LIMIT = 10
+
+# Fields that earn a point when they match one of the student's joined courses
+SCORED_FIELDS = ["discipline", "nptel_domain", "level"]
+
+# Content mode: TF-IDF over the title plus one-hot categorical fields, with these weights
+TEXT_FIELD = "title"
+CATEGORICAL_WEIGHTS = {"discipline": 0.6, "nptel_domain": 0.6, "institute": 0.3, "level": 0.3}
+DEFAULT_NEIGHBOURS = 50
+# Upper bound on similarity entries materialised at once while finding neighbours
+NEIGHBOUR_BLOCK_ELEMENTS = 2 ** 24
+
+
+class CourseIndex:
+    # Inverted index over the catalog: field value -> catalog positions. Positions follow
+    # the collection's natural order, which is also how ties were ordered by $sort.
+
+    def __init__(self, courses):
+        self.courses = courses
+        self.by_course_id = defaultdict(list)
+        self.by_field = {field: defaultdict(list) for field in SCORED_FIELDS}
+
+        for position, course in enumerate(courses):
+            self.by_course_id[course.get("course_id")].append(position)
+            for field in SCORED_FIELDS:
+                value = course.get(field)
+                if value is not None:
+                    try:
+                        self.by_field[field][value].append(position)
+                    except TypeError:
+                        pass  # Unhashable values can never be matched
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(list(db.courses.find({})))
+
+    def recommend(self, joined_ids, limit=DEFAULT_LIMIT):
+        joined = set(joined_ids)
+
+        # Values of the joined courses, same as the metadata loop the aggregation used
+        wanted = {field: set() for field in SCORED_FIELDS}
+        for course_id in joined:
+            for position in self.by_course_id.get(course_id, []):
+                course = self.courses[position]
+                for field in SCORED_FIELDS:
+                    if course.get(field):
+                        try:
+                            wanted[field].add(course[field])
+                        except TypeError:
+                            pass
+
+        scores = defaultdict(int)
+        for field, values in wanted.items():
+            for value in values:
+                for position in self.by_field[field].get(value, []):
+                    scores[position] += 1
+
+        candidates = (
+            (-score, position) for position, score in scores.items()
+            if self.courses[position].get("course_id") not in joined
+        )
+        top = heapq.nsmallest(limit, candidates)
+
+        recommended = []
+        for negative_score, position in top:
+            course = dict(self.courses[position])
+            course["_id"] = str(course["_id"])
+            course["score"] = -negative_score
+            recommended.append(course)
+        return recommended
+
+
+def _one_hot(courses, field):
+    vocabulary = {}
+    rows, cols = [], []
+    for position, course in enumerate(courses):
+        value = course.get(field)
+        if value is None or value == "":
+            continue
+        column = vocabulary.setdefault(str(value).strip().lower(), len(vocabulary))
+        rows.append(position)
+        cols.append(column)
+    return sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(courses), max(len(vocabulary), 1))
+    )
+
+
+def course_feature_matrix(courses):
+    # One L2-normalised sparse row per course, so dot products are cosine similarities
+    titles = [str(course.get(TEXT_FIELD) or "") for course in courses]
+    try:
+        blocks = [TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform(titles)]
+    except ValueError:
+        blocks = []  # No usable words in any title
+    for field, weight in CATEGORICAL_WEIGHTS.items():
+        blocks.append(_one_hot(courses, field) * weight)
+    return normalize(sparse.hstack(blocks).tocsr())
+
+
+def nearest_neighbours(features, k=DEFAULT_NEIGHBOURS):
+    # Sparse n x n matrix holding each course's k most similar courses (self excluded),
+    # computed in row blocks so memory stays bounded for large catalogs
+    n = features.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return sparse.csr_matrix((n, n))
+
+    block = max(1, NEIGHBOUR_BLOCK_ELEMENTS // n)
+    transposed = features.T.tocsc()
+    rows, cols, values = [], [], []
+    for start in range(0, n, block):
+        similarities = (features[start:start + block] @ transposed).toarray()
+        size = similarities.shape[0]
+        similarities[np.arange(size), np.arange(start, start + size)] = 0
+
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_values = np.take_along_axis(similarities, top, axis=1)
+        keep = top_values > 0
+        rows.append(np.repeat(np.arange(start, start + size), k)[keep.ravel()])
+        cols.append(top[keep])
+        values.append(top_values[keep])
+
+    return sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, n)
+    )
+
+
+class ContentIndex:
+    # Content-based mode: a student's score for a course is the summed similarity of that
+    # course to each joined course among their precomputed neighbours, i.e. one sparse
+    # matrix-vector product per request.
+
+    def __init__(self, courses, neighbours=DEFAULT_NEIGHBOURS):
+        self.courses = courses
+        self.by_course_id = defaultdict(list)
+        for position, course in enumerate(courses):
+            self.by_course_id[course.get("course_id")].append(position)
+
+        # Row j of the transpose lists the joined courses j is a neighbour of
+        self.neighbours_t = nearest_neighbours(course_feature_matrix(courses), neighbours).T.tocsr()
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(list(db.courses.find({})))
+
+    def recommend(self, joined_ids, limit=DEFAULT_LIMIT):
+        joined_positions = [p for course_id in set(joined_ids) for p in self.by_course_id.get(course_id, [])]
+        if not joined_positions or not self.courses:
+            return []
+
+        selected = np.zeros(len(self.courses))
+        selected[joined_positions] = 1.0
+        scores = self.neighbours_t @ selected
+        scores[joined_positions] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        # Highest score first, catalog order on ties
+        ranked = sorted(candidates.tolist(), key=lambda position: (-scores[position], position))
+
+        recommended = []
+        for position in ranked:
+            course = dict(self.courses[position])
+            course["_id"] = str(course["_id"])
+            course["score"] = round(float(scores[position]), 4)
+            recommended.append(course)
+        return recommended
+
+
+class Recommender:
+    # Keeps one index per mode for the current catalog version; catalog imports bump the
+    # "courses" version and the index is rebuilt in the background while the previous one
+    # keeps serving
+
+    INDEX_TYPES = {"categorical": CourseIndex, "content": ContentIndex}
+
+    def __init__(self, db, registry):
+        self.db = db
+        self.registry = registry
+        self._indexes = {
+            mode: VersionedIndex(registry, "courses", lambda index_type=index_type: index_type.from_db(db))
+            for mode, index_type in self.INDEX_TYPES.items()
+        }
+
+    def index(self, mode="categorical"):
+        return self._indexes[mode].get()
+
+    def recommend(self, joined_ids, limit=DEFAULT_LIMIT, mode="categorical"):
+        return self.index(mode).recommend(joined_ids, limit)
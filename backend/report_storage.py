@@ -0,0 +1,57 @@
+import gzip
+import zlib
+
+import gridfs
+
+# Report bodies are gzip-compressed HTML in this GridFS bucket; `reports` keeps only metadata
+REPORT_BUCKET = "report_bodies"
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def report_bucket(db):
+    return gridfs.GridFSBucket(db, bucket_name=REPORT_BUCKET)
+
+
+def store_report_body(db, report_html, filename):
+    # Returns the GridFS id and the compressed size to record on the report document
+    raw = report_html.encode("utf-8")
+    body = gzip.compress(raw)
+    body_id = report_bucket(db).upload_from_stream(
+        filename,
+        body,
+        metadata={"contentType": "text/html", "contentEncoding": "gzip", "rawSize": len(raw)}
+    )
+    return body_id, len(body)
+
+
+def open_report_body(db, body_id):
+    return report_bucket(db).open_download_stream(body_id)
+
+
+def accepts_gzip(accept_encodings):
+    # Only an explicit gzip entry with a non-zero quality counts; "*" alone gets plain HTML
+    return any(value.lower() in ("gzip", "x-gzip") and quality > 0 for value, quality in accept_encodings)
+
+
+def iter_gzip_chunks(grid_out):
+    # The stored bytes as-is, for clients that accept gzip
+    try:
+        while True:
+            chunk = grid_out.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        grid_out.close()
+
+
+def iter_html_chunks(grid_out):
+    # Decompress while streaming so the whole report is never held in memory
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in iter_gzip_chunks(grid_out):
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
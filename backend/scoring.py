@@ -0,0 +1,227 @@
+import numpy as np
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from prediction_cache import feature_hash, stored_prediction_update
+
+# How many students are fetched, predicted and written back per round
+DEFAULT_CHUNK_SIZE = 1000
+
+# Student fields the batch endpoint may filter on, by plain equality only
+FILTER_FIELDS = ("profileCompleted", "gender", "standard", "state", "school", "course")
+
+RISK_LABEL_TO_SCORE = {
+    "high": 1,
+    "medium": 0.5,
+    "low": 0
+}
+
+
+def risk_score_for_label(label):
+    # Default to 0 if label is not found, and keep it a native Python int
+    return int(RISK_LABEL_TO_SCORE.get(label, 0))
+
+
+# Student fields in model input order: (field, label encoder name or None, default)
+STUDENT_FEATURES = [
+    ('gender', 'gender', 'Unknown'),
+    ('age', None, 0),
+    ('caste', 'caste', 'Unknown'),
+    ('area', 'area', 'Unknown'),
+    ('standard', None, 0),
+    ('state', 'state', 'Unknown'),
+    ('school', 'school', 'Unknown'),
+    ('maritalStatus', 'maritalStatus', 'Unknown'),
+    ('course', 'course', 'Unknown'),
+    ('previousQualification', 'previousQualification', 'Unknown'),
+    ('motherQualification', 'motherQualification', 'Unknown'),
+    ('fatherQualification', 'fatherQualification', 'Unknown'),
+    ('motherOccupation', 'motherOccupation', 'Unknown'),
+    ('fatherOccupation', 'fatherOccupation', 'Unknown'),
+    ('specialNeeds', 'specialNeeds', 'Unknown'),
+    ('debtor', 'debtor', 'Unknown'),
+    ('tuitionUpToDate', 'tuitionUpToDate', 'Unknown'),
+    ('scholarshipHolder', 'scholarshipHolder', 'Unknown'),
+    ('profileCompleted', None, False),
+]
+
+
+def _derived_features(student, profile, performance_analytics):
+    # Calculate days since registration
+    registered_on = student.get('registeredOn')
+    if registered_on:
+        days_since_registration = (datetime.now() - registered_on).days
+    else:
+        days_since_registration = 0
+
+    # Calculate total activity minutes from performance_analytics
+    total_activity_minutes = sum(item['durationMinutes'] for item in performance_analytics.get('activityLogs', []))
+
+    # Calculate attendance rate
+    attendance_data = profile.get('attendance', {})
+    total_days = attendance_data.get('totalDays', 0)
+    present_days = attendance_data.get('presentDays', 0)
+    attendance_rate = present_days / total_days if total_days > 0 else 0
+
+    # Calculate average score from subjectScores
+    subject_scores = profile.get('subjectScores', [])
+    total_score = sum(subject['score'] for subject in subject_scores)
+    average_score = total_score / len(subject_scores) if subject_scores else 0
+
+    return [days_since_registration, total_activity_minutes, attendance_rate, average_score]
+
+
+def preprocess_data_for_model(student, profile, performance_analytics, course_analytics, encoding_tables):
+    # Encode categorical features with the precompiled lookup tables
+    features = []
+    for field, encoder_name, default in STUDENT_FEATURES:
+        value = student.get(field, default)
+        features.append(encoding_tables.encode(encoder_name, value) if encoder_name else value)
+
+    # Feature vector (combine all features)
+    return np.array(features + _derived_features(student, profile, performance_analytics))
+
+
+def preprocess_batch_for_model(students, profiles, performance_analytics, encoding_tables):
+    # Same features as preprocess_data_for_model, one row per student, encoded column by column
+    columns = []
+    for field, encoder_name, default in STUDENT_FEATURES:
+        values = [student.get(field, default) for student in students]
+        columns.append(encoding_tables.encode_column(encoder_name, values) if encoder_name else values)
+
+    rows = []
+    for i, student in enumerate(students):
+        row = [column[i] for column in columns]
+        rows.append(row + _derived_features(student, profiles[i], performance_analytics[i]))
+    return np.array(rows)
+
+
+def validate_student_filter(student_filter):
+    # Client-supplied filters never reach Mongo as-is: no operators, only whitelisted
+    # fields compared to scalar values
+    if not isinstance(student_filter, dict) or not student_filter:
+        raise ValueError("filter must be a non-empty object")
+    for field, value in student_filter.items():
+        if field.startswith("$") or field not in FILTER_FIELDS:
+            raise ValueError(f"Cannot filter on {field}; allowed fields: {', '.join(FILTER_FIELDS)}")
+        if not isinstance(value, (str, int, float, bool)):
+            raise ValueError(f"filter.{field} must be a plain value")
+    return dict(student_filter)
+
+
+def _first_by_student(cursor):
+    # Keep the first document per studentId, same as find_one would return
+    docs = {}
+    for doc in cursor:
+        docs.setdefault(doc["studentId"], doc)
+    return docs
+
+
+def _iter_student_chunks(db, student_ids, student_filter, chunk_size, errors):
+    # Yields (requested ObjectIds, student documents) one chunk at a time
+    if student_ids is not None:
+        object_ids = []
+        for student_id in student_ids:
+            try:
+                object_ids.append(ObjectId(student_id))
+            except Exception:
+                errors.append({"studentId": str(student_id), "error": "Invalid student id"})
+
+        for start in range(0, len(object_ids), chunk_size):
+            chunk = object_ids[start:start + chunk_size]
+            students = list(db.students.find({"_id": {"$in": chunk}}, {"password": 0}))
+            yield chunk, students
+        return
+
+    chunk = []
+    for student in db.students.find(student_filter or {}, {"password": 0}).batch_size(chunk_size):
+        chunk.append(student)
+        if len(chunk) == chunk_size:
+            yield [s["_id"] for s in chunk], chunk
+            chunk = []
+    if chunk:
+        yield [s["_id"] for s in chunk], chunk
+
+
+def _score_chunk(db, model_version, object_ids, students, results, errors):
+    students_by_id = {s["_id"]: s for s in students}
+
+    # One $in query per collection instead of four find_one calls per student
+    profiles = _first_by_student(db.profiles.find(
+        {"studentId": {"$in": object_ids}},
+        {"studentId": 1, "attendance": 1, "subjectScores": 1}
+    ))
+    analytics = _first_by_student(db.performance_analytics.find(
+        {"studentId": {"$in": object_ids}},
+        {"studentId": 1, "activityLogs": 1}
+    ))
+    with_course_logs = set(db.course_activity_logs.distinct("studentId", {"studentId": {"$in": object_ids}}))
+
+    scored_ids = []
+    scored_students = []
+    for object_id in object_ids:
+        student = students_by_id.get(object_id)
+        if not student:
+            errors.append({"studentId": str(object_id), "error": "Student not found"})
+            continue
+        if object_id not in profiles:
+            errors.append({"studentId": str(object_id), "error": "Profile not found"})
+            continue
+        if object_id not in analytics:
+            errors.append({"studentId": str(object_id), "error": "Profile analytics not found"})
+            continue
+        if object_id not in with_course_logs:
+            errors.append({"studentId": str(object_id), "error": "Course analytics not found"})
+            continue
+
+        scored_ids.append(object_id)
+        scored_students.append(student)
+
+    if not scored_ids:
+        return
+
+    # Single predict call for the whole chunk
+    features = preprocess_batch_for_model(
+        scored_students,
+        [profiles[object_id] for object_id in scored_ids],
+        [analytics[object_id] for object_id in scored_ids],
+        model_version.encoding_tables
+    )
+    predictions = model_version.predict(features)
+    predicted_labels = model_version.label_encoders['riskLabel'].inverse_transform(predictions)
+
+    operations = []
+    for object_id, row, label in zip(scored_ids, features, predicted_labels):
+        label = str(label)
+        risk_score = risk_score_for_label(label)
+        operations.append(UpdateOne(
+            {"studentId": object_id},
+            stored_prediction_update(risk_score, label, model_version.version, feature_hash(row)),
+            upsert=True
+        ))
+        results.append({
+            "studentId": str(object_id),
+            "dropoutRiskPrediction": label,
+            "riskScore": risk_score,
+            "modelVersion": model_version.version
+        })
+
+    db.performance_analytics.bulk_write(operations, ordered=False)
+
+
+def score_students(db, model_version, student_ids=None, student_filter=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Batch version of /model_predict: either a list of ids or a filter on `students`
+    results = []
+    errors = []
+
+    for object_ids, students in _iter_student_chunks(db, student_ids, student_filter, chunk_size, errors):
+        _score_chunk(db, model_version, object_ids, students, results, errors)
+
+    return {
+        "modelVersion": model_version.version,
+        "scored": len(results),
+        "failed": len(errors),
+        "results": results,
+        "errors": errors
+    }
@@ -0,0 +1,65 @@
+from performance import SUMMARY_FIELD
+
+# Only the fields get_student_dashboard reads from each collection
+PROFILE_FIELDS = ["gender", "age", "caste", "area", "standard", "state", "school"]
+PERFORMANCE_FIELDS = [SUMMARY_FIELD, "dailyProgress", "attendance", "subjectScores", "timeSpent", "riskScore", "riskLabel"]
+COURSE_FIELDS = ["courseId", "courseTitle", "origin", "joinLink", "lastAccessed"]
+
+
+# $lookup with both localField/foreignField and a pipeline needs MongoDB 5.0
+CONCISE_LOOKUP_VERSION = (5, 0)
+_concise_lookup = {}
+
+
+def supports_concise_lookup(db):
+    # Asked once per client
+    key = id(db.client)
+    if key not in _concise_lookup:
+        version = tuple(db.client.server_info().get("versionArray", [0])[:2])
+        _concise_lookup[key] = version >= CONCISE_LOOKUP_VERSION
+    return _concise_lookup[key]
+
+
+def _lookup(collection, fields, as_field, limit=None, concise=True):
+    # An equality match on the indexed studentId, which the server runs as an index lookup
+    # rather than evaluating a correlated $expr sub-pipeline per joined document
+    lookup = {"from": collection, "localField": "_id", "foreignField": "studentId", "as": as_field}
+    if concise:
+        pipeline = [{"$limit": limit}] if limit else []
+        # _id stays in so an existing document never projects down to an empty (falsy) dict
+        pipeline.append({"$project": {field: 1 for field in fields}})
+        lookup["pipeline"] = pipeline
+    return {"$lookup": lookup}
+
+
+def dashboard_pipeline(student_obj_id, concise=True):
+    lookups = [
+        ("profiles", PROFILE_FIELDS, "profile", 1),
+        ("performance_analytics", PERFORMANCE_FIELDS, "performance", 1),
+        ("course_activity_logs", COURSE_FIELDS, "courseLogs", None),
+    ]
+    pipeline = [
+        {"$match": {"_id": student_obj_id}},
+        {"$project": {"name": 1, "email": 1}},
+    ]
+    pipeline += [_lookup(collection, fields, as_field, limit, concise) for collection, fields, as_field, limit in lookups]
+    if not concise:
+        # Older servers: trim the joined documents after the join instead
+        projection = {"name": 1, "email": 1}
+        for _, fields, as_field, _ in lookups:
+            projection[f"{as_field}._id"] = 1
+            projection.update({f"{as_field}.{field}": 1 for field in fields})
+        pipeline.append({"$project": projection})
+    return pipeline
+
+
+def fetch_dashboard_documents(db, student_obj_id):
+    # (student, profile, performance, course_logs) in one round trip instead of four
+    result = next(db.students.aggregate(dashboard_pipeline(student_obj_id, supports_concise_lookup(db))), None)
+    if result is None:
+        return None, None, None, []
+
+    profile = result.pop("profile")
+    performance = result.pop("performance")
+    course_logs = result.pop("courseLogs")
+    return result, (profile[0] if profile else None), (performance[0] if performance else None), course_logs
@@ -1,6 +1,18 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-from pymongo import MongoClient
-import json
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from catalog_sync import print_changeset, sync_catalog  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Sync the NPTEL course sheet into db.courses")
+parser.add_argument("--dry-run", action="store_true", help="Report the changeset without writing it")
+args = parser.parse_args()
 
 # Step 1: Load Excel
 df = pd.read_excel(r"D:\Projects\New folder\anvesha\datasets\Final Course List (Jan - Apr 2025).xlsx")
@@ -36,16 +48,12 @@ df = df[wanted_columns]
 # Step 4: Fill missing with ""
 df = df.fillna("")
 
-# Step 5: Add origin field
-df["origin"] = "NPTEL"
-
-# Step 6: Convert to list of dictionaries
+# Step 5: Convert to list of dictionaries
 courses = df.to_dict(orient="records")
 
-# Step 7: Upload to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["anvesha"]
-db.courses.delete_many({})  # Optional: clear previous courses
-db.courses.insert_many(courses)
+# Step 6: Apply only the inserts, updates and deletes against the stored catalog
+db = get_db()
+changes = sync_catalog(db, courses, origin="NPTEL", dry_run=args.dry_run)
 
-print(f"✅ Uploaded {len(courses)} cleaned courses to MongoDB")
+print_changeset(changes, dry_run=args.dry_run)
+print(f"✅ Synced {len(courses)} cleaned courses to MongoDB")
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+DATASET_COLLECTION = "bench_dataset"
+DISCIPLINES = ["Computer Science", "Mechanical Engineering", "Mathematics", "Management", "Physics", "Humanities"]
+LEVELS = ["UG", "PG", "UG/PG"]
+TITLE_WORDS = ["Introduction", "Advanced", "Machine", "Learning", "Data", "Systems", "Design", "Theory",
+               "Fluid", "Mechanics", "Networks", "Algorithms", "Economics", "Signals", "Control", "Analysis"]
+BULK_EVENTS_PER_REQUEST = 50
+
+# Every route under test: name -> (method, path, body builder or None). Paths and bodies are
+# filled from a random seeded student for each request.
+SCENARIOS = {
+    "dashboard": ("GET", "/api/dashboard/" + DATASET_COLLECTION, None),
+    "student-dashboard": ("GET", "/api/student-dashboard/{student}", None),
+    "profile": ("GET", "/api/profile/{student}", None),
+    "performance": ("GET", "/api/performance/{student}", None),
+    "activity-read": ("GET", "/api/activity/{student}", None),
+    "recommendations": ("GET", "/api/recommendations/{student}", None),
+    "recommendations-content": ("GET", "/api/recommendations/{student}?mode=content", None),
+    "courses-page": ("GET", "/api/courses?limit=50", None),
+    "course-search": ("GET", "/api/courses/search?q={query}", None),
+    "model-predict": ("GET", "/model_predict/{student}", None),
+    "activity-write": ("PUT", "/api/activity/{student}/{course}", lambda ctx: {"durationMinutes": 5}),
+    "activity-bulk": ("POST", "/api/activity/bulk", lambda ctx: ctx["bulk_events"]),
+}
+
+
+class Population:
+    # Synthetic students created through the API itself, so every collection is shaped exactly
+    # the way the routes write it
+
+    def __init__(self, students, courses):
+        self.students = students  # [(student_id, [course_id, ...])]
+        self.courses = courses
+
+    def context(self, rng):
+        student_id, course_ids = rng.choice(self.students)
+        course = rng.choice(course_ids) if course_ids else "default_course_id"
+        title = rng.choice(self.courses)["title"]
+        return {
+            "student": student_id,
+            "course": course,
+            "query": "+".join(word[:4].lower() for word in title.split()[:2]),
+            "bulk_events": [
+                {"studentId": student_id, "courseId": rng.choice(course_ids or [course]), "durationMinutes": rng.randint(1, 60)}
+                for _ in range(BULK_EVENTS_PER_REQUEST)
+            ],
+        }
+
+
+def seed_catalog(db, size, rng):
+    from collection_registry import bump_dataset_version
+
+    courses = [
+        {
+            "course_id": f"bench-{index:05d}",
+            "title": " ".join(rng.sample(TITLE_WORDS, 3)),
+            "instructor": f"Prof. Instructor {index % 97}",
+            "institute": f"Institute {index % 23}",
+            "discipline": rng.choice(DISCIPLINES),
+            "nptel_domain": rng.choice(DISCIPLINES),
+            "level": rng.choice(LEVELS),
+            "join_link": f"https://example.org/courses/{index}",
+            "origin": "NPTEL",
+        }
+        for index in range(size)
+    ]
+    db.courses.insert_many([dict(course) for course in courses], ordered=False)
+    bump_dataset_version(db, "courses")
+    return courses
+
+
+def seed_population(client, db, args, rng):
+    from benchmark_dashboard import seed_collection
+    from collection_registry import bump_dataset_version
+
+    courses = seed_catalog(db, args.catalog, rng)
+    seed_collection(db[DATASET_COLLECTION], args.dataset_rows)
+    bump_dataset_version(db, DATASET_COLLECTION)
+
+    today = datetime.utcnow()
+    students = []
+    for index in range(args.students):
+        response = client.post("/api/register", json={
+            "name": f"Bench Student {index}", "email": f"bench{index}@example.org", "password": "bench"
+        })
+        student_id = response.get_json()["studentId"]
+
+        joined = rng.sample(courses, min(args.courses_per_student, len(courses)))
+        for course in joined:
+            client.post("/api/activity", json={
+                "studentId": student_id, "courseId": course["course_id"], "courseTitle": course["title"],
+                "origin": course["origin"], "joinLink": course["join_link"]
+            })
+
+        events = [
+            {"studentId": student_id, "courseId": course["course_id"], "durationMinutes": rng.randint(5, 90),
+             "date": (today - timedelta(days=day)).isoformat()}
+            for course in joined for day in range(args.days) if rng.random() < 0.6
+        ]
+        for start in range(0, len(events), 5000):
+            client.post("/api/activity/bulk", json=events[start:start + 5000])
+
+        students.append((student_id, [course["course_id"] for course in joined]))
+    return Population(students, courses)
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class InProcessDriver:
+    # Calls the Flask app directly: measures the app and the database, not HTTP parsing
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code
+
+
+class HttpDriver:
+    # Drives a running server, e.g. gunicorn with the production worker count
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def run_scenario(driver, population, name, concurrency, requests, seed):
+    method, path_template, body_builder = SCENARIOS[name]
+    # Contexts are drawn up front so every run with the same seed sends the same requests
+    rng = random.Random(f"{seed}-{name}-{concurrency}")
+    contexts = [population.context(rng) for _ in range(requests)]
+
+    def call(ctx):
+        path = path_template.format(**ctx)
+        body = body_builder(ctx) if body_builder else None
+        start = time.perf_counter()
+        try:
+            status = driver.request(method, path, body)
+        except Exception:
+            status = 599
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(call, contexts))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _ in outcomes)
+    return {
+        "route": name,
+        "method": method,
+        "path": path_template,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(1 for _, status in outcomes if status >= 400),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(row["route"], row["concurrency"]): row for row in json.load(f)["results"]}
+    print(f"\nAgainst {baseline_path}:")
+    for row in results:
+        before = baseline.get((row["route"], row["concurrency"]))
+        if before and before["p95_ms"]:
+            change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            print(f"  {row['route']:<24} c={row['concurrency']:<3} p95 {before['p95_ms']:>9.2f} -> "
+                  f"{row['p95_ms']:>9.2f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic population and load-test every API route")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--db", default="anvesha_bench")
+    parser.add_argument("--mongomock", action="store_true", help="Use an in-process mongomock client instead")
+    parser.add_argument("--base-url", help="Drive a running server over HTTP instead of the app in process; "
+                                           "start it with MONGO_DATABASE set to --db so it sees the seeded data")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--courses-per-student", type=int, default=5)
+    parser.add_argument("--catalog", type=int, default=2000, help="Courses in the synthetic catalog")
+    parser.add_argument("--days", type=int, default=60, help="Days of activity history per course")
+    parser.add_argument("--dataset-rows", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=300, help="Requests per route and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--routes", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results file to print p95 changes against")
+    parser.add_argument("--keep", action="store_true", help="Leave the benchmark database in place")
+    args = parser.parse_args()
+
+    if args.db == "anvesha":
+        parser.error("refusing to seed (and drop) the live 'anvesha' database")
+
+    output = os.path.abspath(args.output)
+
+    # The app reads these at import time; models and .env paths are relative to backend/
+    os.environ["MongoURI"] = args.mongo_uri
+    os.environ["MONGO_DATABASE"] = args.db
+    os.chdir(BACKEND_DIR)
+
+    import mongo_client
+    if args.mongomock:
+        import mongomock
+        mongo_client.MongoClient = mongomock.MongoClient
+
+    from app import app, client, db
+    if db.name != args.db:
+        sys.exit(f"App is bound to '{db.name}' instead of '{args.db}'; not seeding")
+
+    client.drop_database(args.db)
+    rng = random.Random(args.seed)
+    print(f"Seeding {args.students} students x {args.courses_per_student} courses x {args.days} days, "
+          f"{args.catalog} catalog courses, {args.dataset_rows} dataset rows...")
+    started = time.perf_counter()
+    population = seed_population(app.test_client(), db, args, rng)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    driver = HttpDriver(args.base_url) if args.base_url else InProcessDriver(app)
+
+    results = []
+    for name in args.routes:
+        run_scenario(driver, population, name, 1, args.warmup, args.seed)  # Indexes, caches, connections
+        for concurrency in args.concurrency:
+            row = run_scenario(driver, population, name, concurrency, args.requests, args.seed)
+            results.append(row)
+            print(f"{name:<24} c={concurrency:<3} p50 {row['p50_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  "
+                  f"p99 {row['p99_ms']:8.2f} ms  {row['throughput_rps']:8.1f} req/s  errors {row['errors']}")
+
+    report = {
+        "commit": git_commit(),
+        "recordedOn": datetime.utcnow().isoformat(),
+        "backend": "mongomock" if args.mongomock else "mongodb",
+        "driver": "http" if args.base_url else "in-process",
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if not args.keep:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from dashboard import compute_dashboard  # noqa: E402
+from mongo_client import get_client  # noqa: E402
+
+TARGETS = ["Dropout", "Graduate", "Enrolled"]
+
+
+def seed_collection(collection, rows, batch_size=10000):
+    # Synthetic rows shaped like the india/maharashtra dataset collections
+    collection.drop()
+    rng = random.Random(42)
+    for start in range(0, rows, batch_size):
+        batch = [
+            {
+                "Gender": rng.randint(0, 1),
+                "Debtor": rng.randint(0, 1),
+                "Tuition fees up to date": rng.randint(0, 1),
+                "Age at enrollment": rng.randint(16, 60),
+                "Target": rng.choice(TARGETS),
+            }
+            for _ in range(min(batch_size, rows - start))
+        ]
+        collection.insert_many(batch, ordered=False)
+
+
+def legacy_dashboard(collection):
+    # The previous implementation: six round trips plus a full scan in Python
+    total_students = collection.count_documents({})
+    dropout_students = collection.count_documents({"Target": "Dropout"})
+    dropout_rate = (dropout_students / total_students) * 100 if total_students else 0
+
+    def group_by_attr_vs_dropout(field):
+        pipeline = [{"$group": {"_id": {field: f"${field}", "Target": "$Target"}, "count": {"$sum": 1}}}]
+        grouped = defaultdict(lambda: defaultdict(int))
+        for row in collection.aggregate(pipeline):
+            grouped[row["_id"][field]][row["_id"]["Target"]] += row["count"]
+        return grouped
+
+    age_bucket_map = {"<18": [], "18-22": [], "23-26": [], "27-30": [], "31+": []}
+    for doc in collection.find({}, {"Age at enrollment": 1, "Target": 1}):
+        age = doc.get("Age at enrollment", 0)
+        bucket = (
+            "<18" if age < 18 else
+            "18-22" if age <= 22 else
+            "23-26" if age <= 26 else
+            "27-30" if age <= 30 else
+            "31+"
+        )
+        age_bucket_map[bucket].append(doc.get("Target", "Unknown"))
+
+    age_vs_dropout = {}
+    for bucket, targets in age_bucket_map.items():
+        counts = defaultdict(int)
+        for t in targets:
+            counts[t] += 1
+        age_vs_dropout[bucket] = dict(counts)
+
+    return {
+        "total_students": total_students,
+        "dropout_students": dropout_students,
+        "dropout_rate": round(dropout_rate, 2),
+        "gender_vs_dropout": group_by_attr_vs_dropout("Gender"),
+        "debtor_vs_dropout": group_by_attr_vs_dropout("Debtor"),
+        "tuition_vs_dropout": group_by_attr_vs_dropout("Tuition fees up to date"),
+        "age_vs_dropout": age_vs_dropout
+    }
+
+
+def time_call(fn, collection, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(collection)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and $facet dashboard queries")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--db", default="anvesha_bench")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = get_client(args.mongo_uri)
+    collection = client[args.db]["dashboard_bench"]
+
+    for rows in args.rows:
+        seed_collection(collection, rows)
+        legacy_time, legacy_result = time_call(legacy_dashboard, collection, args.repeat)
+        facet_time, facet_result = time_call(compute_dashboard, collection, args.repeat)
+
+        same = json.dumps(legacy_result, sort_keys=True) == json.dumps(facet_result, sort_keys=True)
+        print(f"{rows:>8} rows | legacy {legacy_time * 1000:8.1f} ms | $facet {facet_time * 1000:8.1f} ms | "
+              f"speedup {legacy_time / facet_time:5.1f}x | same output: {same}")
+
+    collection.drop()
+
+
+if __name__ == "__main__":
+    main()
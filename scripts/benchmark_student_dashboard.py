@@ -0,0 +1,116 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from activity import BUCKETS_COLLECTION, month_start  # noqa: E402
+from student_dashboard import fetch_dashboard_documents  # noqa: E402
+from mongo_client import DATABASE_NAME, get_client  # noqa: E402
+
+
+def seed_student(db, courses, days):
+    # One student with `courses` enrollments and `days` days of activity on each
+    student_id = db.students.insert_one({"name": "Bench Student", "email": f"bench-{ObjectId()}@example.com",
+                                         "password": "x", "registeredOn": datetime.utcnow()}).inserted_id
+    db.profiles.insert_one({"studentId": student_id, "gender": "Male", "age": 20, "caste": "Unknown", "area": "Unknown",
+                            "standard": "Unknown", "state": "Unknown", "school": "Not specified"})
+    db.performance_analytics.insert_one({"studentId": student_id, "riskScore": 0, "riskLabel": "low",
+                                         "activitySummary": {"courses": {}}})
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    enrollments = []
+    buckets = {}
+    for c in range(courses):
+        course_id = f"bench-course-{c}"
+        logs = [{"date": today - timedelta(days=d), "durationMinutes": 30} for d in range(days)]
+        # Array-based enrollments are what the legacy query used to pull in full
+        enrollments.append({"studentId": student_id, "courseId": course_id, "courseTitle": f"Course {c}",
+                            "origin": "NPTEL", "joinLink": "", "lastAccessed": today, "activityLogs": logs})
+        for log in logs:
+            key = (course_id, month_start(log["date"]))
+            buckets.setdefault(key, []).append(log)
+    db.course_activity_logs.insert_many(enrollments)
+    db[BUCKETS_COLLECTION].insert_many([
+        {"studentId": student_id, "courseId": course_id, "month": month, "activityLogs": logs}
+        for (course_id, month), logs in buckets.items()
+    ])
+    return student_id
+
+
+def seed_population(db, students, courses_each=3, batch_size=5000):
+    # Other students, so every join searches collections of realistic size
+    for offset in range(0, students, batch_size):
+        ids = [ObjectId() for _ in range(min(batch_size, students - offset))]
+        db.students.insert_many([{"_id": i, "name": "Other Student", "email": f"other-{i}@example.com",
+                                  "password": "x", "registeredOn": datetime.utcnow()} for i in ids])
+        db.profiles.insert_many([{"studentId": i, "gender": "Female", "age": 21, "state": "Unknown"} for i in ids])
+        db.performance_analytics.insert_many([{"studentId": i, "riskScore": 0, "riskLabel": "low",
+                                               "activitySummary": {"courses": {}}} for i in ids])
+        db.course_activity_logs.insert_many([
+            {"studentId": i, "courseId": f"bench-course-{c}", "courseTitle": f"Course {c}", "origin": "NPTEL",
+             "joinLink": "", "lastAccessed": datetime.utcnow()}
+            for i in ids for c in range(courses_each)
+        ])
+
+
+def legacy_fetch(db, student_id):
+    # The previous four sequential round trips, reading whole documents
+    student = db.students.find_one({"_id": student_id})
+    profile = db.profiles.find_one({"studentId": student_id})
+    performance = db.performance_analytics.find_one({"studentId": student_id})
+    course_logs = list(db.course_activity_logs.find({"studentId": student_id}))
+    return student, profile, performance, course_logs
+
+
+def measure(fn, db, student_id, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(db, student_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and \\$lookup student dashboard fetches")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--db", default="anvesha_bench")
+    parser.add_argument("--courses", type=int, nargs="+", default=[5, 50, 200])
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--other-students", type=int, default=50000,
+                        help="Students seeded around the measured ones, so the joined collections are populated")
+    args = parser.parse_args()
+
+    if args.db in ("anvesha", DATABASE_NAME):
+        parser.error(f"refusing to seed (and drop) the live '{args.db}' database")
+
+    client = get_client(args.mongo_uri)
+    client.drop_database(args.db)
+    db = client[args.db]
+    db.profiles.create_index("studentId")
+    db.performance_analytics.create_index("studentId")
+    db.course_activity_logs.create_index([("studentId", 1), ("courseId", 1)])
+    seed_population(db, args.other_students)
+    print(f"Seeded {args.other_students} other students")
+
+    for courses in args.courses:
+        student_id = seed_student(db, courses, args.days)
+        legacy_p50, legacy_p95 = measure(legacy_fetch, db, student_id, args.repeat)
+        lookup_p50, lookup_p95 = measure(fetch_dashboard_documents, db, student_id, args.repeat)
+        print(f"{courses:>4} courses | legacy p50 {legacy_p50:7.2f} ms p95 {legacy_p95:7.2f} ms | "
+              f"$lookup p50 {lookup_p50:7.2f} ms p95 {lookup_p95:7.2f} ms")
+
+    client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Checks the compiled forest against the scikit-learn model it was built from
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from forest import CompiledForest, boundary_rows  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+from scoring import preprocess_batch_for_model  # noqa: E402
+
+
+def training_rows(path, model, n_features):
+    # A CSV export of the training matrix (e.g. X_train.to_csv from the notebook)
+    df = pd.read_csv(path)
+    names = list(getattr(model, "feature_names_in_", []))
+    if names and all(name in df.columns for name in names):
+        df = df[names]
+    else:
+        df = df.select_dtypes("number").iloc[:, :n_features]
+    return df.to_numpy(dtype=np.float64)
+
+
+def student_rows(db, model_version, limit):
+    # Feature vectors of current students, built exactly as /model_predict builds them
+    students = list(db.students.find({}, {"password": 0}).limit(limit))
+    ids = [student["_id"] for student in students]
+    profiles = {doc["studentId"]: doc for doc in db.profiles.find({"studentId": {"$in": ids}})}
+    analytics = {doc["studentId"]: doc for doc in db.performance_analytics.find(
+        {"studentId": {"$in": ids}}, {"studentId": 1, "activityLogs": 1}
+    )}
+    usable = [student for student in students if student["_id"] in profiles and student["_id"] in analytics]
+    if not usable:
+        return np.zeros((0, model_version.n_features))
+    return np.asarray(preprocess_batch_for_model(
+        usable,
+        [profiles[student["_id"]] for student in usable],
+        [analytics[student["_id"]] for student in usable],
+        model_version.encoding_tables
+    ), dtype=np.float64)
+
+
+def compare(name, compiled, model, X):
+    expected = model.predict(X)
+    actual = compiled.predict(X)
+    mismatches = int(np.sum(expected != actual))
+    proba_diff = float(np.max(np.abs(compiled.predict_proba(X) - model.predict_proba(X)))) if len(X) else 0.0
+    print(f"{name:<10} {len(X):>7} rows | {mismatches} label mismatches | max probability difference {proba_diff:.2e}")
+    return mismatches
+
+
+def median_microseconds(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the compiled random forest against the original model")
+    parser.add_argument("--model-version", help="Model version to check (default: newest on disk)")
+    parser.add_argument("--training-csv", help="Training feature matrix to compare on")
+    parser.add_argument("--boundary-rows", type=int, default=20000)
+    parser.add_argument("--students", type=int, default=0, help="Also compare on this many students from MongoDB")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions")
+    args = parser.parse_args()
+
+    model_version = ModelRegistry(os.path.join(BACKEND_DIR, "models")).reload(args.model_version)
+    model = model_version.model
+    compiled = CompiledForest.from_model(model)
+    print(f"Model {model_version.version}: {len(compiled.roots)} trees, {len(compiled.feature)} nodes, "
+          f"depth {compiled.max_depth}, {len(compiled.classes)} classes")
+
+    sources = [("boundary", boundary_rows(compiled, model_version.n_features, args.boundary_rows))]
+    if args.training_csv:
+        sources.append(("training", training_rows(args.training_csv, model, model_version.n_features)))
+    if args.students:
+        db = get_db(uri=args.mongo_uri)
+        sources.append(("students", student_rows(db, model_version, args.students)))
+
+    mismatches = sum(compare(name, compiled, model, X) for name, X in sources)
+
+    X = sources[-1][1] if len(sources[-1][1]) else sources[0][1]
+    batch = X[:1000]
+    print(f"single row: scikit-learn {median_microseconds(lambda: model.predict(X[:1]), args.repeat):9.1f} us | "
+          f"compiled {median_microseconds(lambda: compiled.predict(X[0]), args.repeat):9.1f} us")
+    print(f"{len(batch)} rows:  scikit-learn {median_microseconds(lambda: model.predict(batch), args.repeat // 10 or 1):9.1f} us | "
+          f"compiled {median_microseconds(lambda: compiled.predict(batch), args.repeat // 10 or 1):9.1f} us")
+
+    if mismatches:
+        print(f"[❌] {mismatches} predictions differ")
+        sys.exit(1)
+    print("✅ Compiled forest matches the original model")
+
+
+if __name__ == "__main__":
+    main()
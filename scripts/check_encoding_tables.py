@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Checks EncodingTables against LabelEncoder.transform with 0 for unseen values, which is
+# what safe_transform returned before the lookup tables replaced it
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from encoding import UNKNOWN_CODE, EncodingTables  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+UNSEEN_VALUES = ["", "Unknown", "__unseen__", " ", "zzz", -1, 0, 1, 1.5, True, None]
+
+
+def safe_transform(label_encoder, value):
+    try:
+        if value in label_encoder.classes_:
+            return label_encoder.transform([value])[0]
+        return UNKNOWN_CODE
+    except (KeyError, TypeError, ValueError):
+        return UNKNOWN_CODE
+
+
+def check_encoder(name, label_encoder, tables):
+    classes = list(label_encoder.classes_.tolist())
+    columns = {
+        "classes": classes,
+        "unseen": UNSEEN_VALUES,
+        "mixed": classes + UNSEEN_VALUES,
+        # Same kind as classes_, so it takes the binary search path
+        "same-kind": classes + [value for value in UNSEEN_VALUES if type(value) is type(classes[0])] if classes else []
+    }
+    mismatches = 0
+    for column_name, values in columns.items():
+        expected = np.array([safe_transform(label_encoder, value) for value in values], dtype=np.int64)
+        single = np.array([tables.encode(name, value) for value in values], dtype=np.int64)
+        batch = tables.encode_column(name, values)
+        for label, actual in (("encode", single), ("encode_column", batch)):
+            bad = [values[i] for i in np.flatnonzero(expected != actual)]
+            if bad:
+                mismatches += len(bad)
+                print(f"[❌] {name}/{column_name}: {label} differs for {bad[:5]!r}")
+    print(f"{name:<24} {len(classes):>5} classes checked")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the categorical lookup tables against the label encoders")
+    parser.add_argument("--model-version", help="Model version to check (default: newest on disk)")
+    args = parser.parse_args()
+
+    model_version = ModelRegistry(os.path.join(BACKEND_DIR, "models")).reload(args.model_version)
+    tables = EncodingTables(model_version.label_encoders)
+    mismatches = sum(
+        check_encoder(name, label_encoder, tables)
+        for name, label_encoder in model_version.label_encoders.items()
+    )
+
+    if mismatches:
+        print(f"[❌] {mismatches} encodings differ")
+        sys.exit(1)
+    print("✅ Lookup tables match the label encoders")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
+import os
+import sys
+
 import pandas as pd
-from pymongo import MongoClient
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from catalog_sync import print_changeset, sync_catalog  # noqa: E402
+from mongo_client import get_db  # noqa: E402
 
 # Step 1: Read Excel file
 df = pd.read_excel(r"D:\Projects\New folder\anvesha\datasets\Final Course List (Jan - Apr 2025).xlsx")
@@ -31,11 +39,10 @@ df = df.dropna(subset=["course_id", "title", "discipline"], how="all")
 course_documents = df.to_dict(orient='records')
 
 # Step 5: Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["anvesha"]
-courses_collection = db["courses"]
+db = get_db()
 
-# Step 6: Insert into MongoDB
-courses_collection.insert_many(course_documents)
+# Step 6: Sync by course_id instead of appending, so reruns do not duplicate the catalog
+changes = sync_catalog(db, course_documents, origin="NPTEL")
 
-print(f"✅ Inserted {len(course_documents)} courses into MongoDB 'courses' collection.")
+print_changeset(changes)
+print(f"✅ Synced {len(course_documents)} courses into MongoDB 'courses' collection.")
@@ -0,0 +1,40 @@
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from activity import BUCKETS_COLLECTION, month_start  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
+# Move the unbounded activityLogs arrays into monthly buckets. Safe to rerun: each month's
+# migrated entries are $set (not appended) into legacyLogs, and readers ignore legacyLogs
+# until the array is removed from the enrollment document.
+db = get_db()
+
+migrated = 0
+for enrollment in db.course_activity_logs.find({"activityLogs": {"$exists": True}}):
+    by_month = defaultdict(list)
+    for log in enrollment.get("activityLogs", []):
+        date = log.get("date")
+        by_month[month_start(date) if isinstance(date, datetime) else datetime(1970, 1, 1)].append(log)
+
+    operations = [
+        UpdateOne(
+            {"studentId": enrollment["studentId"], "courseId": enrollment["courseId"], "month": month},
+            {"$set": {"legacyLogs": logs}},
+            upsert=True
+        )
+        for month, logs in by_month.items()
+    ]
+    if operations:
+        db[BUCKETS_COLLECTION].bulk_write(operations, ordered=False)
+
+    db.course_activity_logs.update_one({"_id": enrollment["_id"]}, {"$unset": {"activityLogs": ""}})
+    migrated += 1
+
+print(f"✅ Moved activity of {migrated} enrollments into '{BUCKETS_COLLECTION}'")
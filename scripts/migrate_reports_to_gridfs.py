@@ -0,0 +1,25 @@
+import os
+import sys
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from report_storage import store_report_body  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
+# Move inline report HTML into compressed GridFS bodies, one report at a time
+db = get_db()
+
+migrated = 0
+for report in db.reports.find({"html": {"$exists": True}, "body_id": {"$exists": False}}, {"_id": 1, "dataset": 1}):
+    # Fetch each body separately so only one report is in memory at a time
+    html = db.reports.find_one({"_id": report["_id"]}, {"html": 1}).get("html", "")
+    body_id, body_size = store_report_body(db, html, f"{report.get('dataset', 'report')}-{report['_id']}.html.gz")
+    db.reports.update_one(
+        {"_id": report["_id"]},
+        {"$set": {"body_id": body_id, "body_encoding": "gzip", "body_size": body_size}, "$unset": {"html": ""}}
+    )
+    migrated += 1
+
+print(f"✅ Moved {migrated} report bodies to GridFS")
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+
+from bson import ObjectId
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from performance import rebuild_performance_summary  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild performance_analytics activity summaries from course_activity_logs")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--ids", nargs="*", help="Student ids to rebuild (default: every student with activity)")
+    args = parser.parse_args()
+
+    db = get_db(uri=args.mongo_uri)
+
+    if args.ids:
+        student_ids = [ObjectId(student_id) for student_id in args.ids]
+    else:
+        student_ids = db.course_activity_logs.distinct("studentId")
+
+    for count, student_obj_id in enumerate(student_ids, start=1):
+        rebuild_performance_summary(db, student_obj_id)
+        if count % 1000 == 0:
+            print(f"... rebuilt {count} students")
+
+    print(f"✅ Rebuilt performance summaries for {len(student_ids)} students")
+
+
+if __name__ == "__main__":
+    main()
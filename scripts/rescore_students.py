@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+import sys
+
+
+# Reuse the backend scoring code so the CLI and the API predict the same way
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from model_registry import ModelRegistry  # noqa: E402
+from scoring import DEFAULT_CHUNK_SIZE, score_students  # noqa: E402
+from mongo_client import get_db  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score dropout risk for many students at once")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--ids", nargs="*", help="Student ids to score (default: every student)")
+    parser.add_argument("--filter", help="JSON filter on the students collection, e.g. '{\"profileCompleted\": true}'")
+    parser.add_argument("--model-version", help="Model version to score with (default: newest on disk)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = get_db(uri=args.mongo_uri)
+
+    model_version = ModelRegistry(os.path.join(BACKEND_DIR, "models")).reload(args.model_version)
+
+    student_filter = json.loads(args.filter) if args.filter else {}
+    summary = score_students(
+        db, model_version,
+        student_ids=args.ids or None,
+        student_filter=student_filter,
+        chunk_size=args.chunk_size
+    )
+
+    for error in summary["errors"]:
+        print(f"[❌] {error['studentId']}: {error['error']}")
+    print(f"✅ Scored {summary['scored']} students with model {summary['modelVersion']} ({summary['failed']} skipped)")
+
+
+if __name__ == "__main__":
+    main()
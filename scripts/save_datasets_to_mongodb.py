@@ -1,26 +1,137 @@
-import pandas as pd
-from pymongo import MongoClient
+import argparse
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from pymongo.errors import BulkWriteError
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client['anvesha']
+from collection_registry import bump_dataset_version  # noqa: E402
+from mongo_client import get_db  # noqa: E402
 
 # Path to the folder containing all your CSVs
-dataset_folder = r"D:\Projects\New folder\anvesha\datasets"
-
-# Loop through each CSV and insert into MongoDB
-for filename in os.listdir(dataset_folder):
-    if filename.endswith('.csv'):
-        dataset_name = filename.replace('.csv', '').lower().replace(' ', '_')  # e.g., maharashtra.csv -> maharashtra_dataset
-        filepath = os.path.join(dataset_folder, filename)
-
-        # Read and clean
-        df = pd.read_csv(filepath)
-        if 'Nacionality' in df.columns:
-            df.rename(columns={'Nacionality': 'Nationality'}, inplace=True)
-
-        collection = db[f"{dataset_name}"]
-        collection.delete_many({})
-        collection.insert_many(df.to_dict('records'))
-        print(f"✅ Inserted {filename} into '{dataset_name}'")
+DEFAULT_DATASET_FOLDER = r"D:\Projects\New folder\anvesha\datasets"
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_WORKERS = 4
+
+# One document per dataset being loaded: which file it is and how many chunks are in staging
+PROGRESS_COLLECTION = "dataset_loads"
+STAGING_SUFFIX = "__staging"
+DUPLICATE_KEY = 11000
+
+
+def dataset_name_for(filename):
+    return filename.replace('.csv', '').lower().replace(' ', '_')  # e.g., maharashtra.csv -> maharashtra
+
+
+def file_fingerprint(filepath):
+    stat = os.stat(filepath)
+    return {"size": stat.st_size, "modified": int(stat.st_mtime)}
+
+
+def insert_chunk(collection, records):
+    # Unordered, so a resumed chunk only skips the rows that already made it in
+    try:
+        collection.insert_many(records, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+            raise
+
+
+def collection_exists(db, name):
+    return bool(db.list_collection_names(filter={"name": name}))
+
+
+def finish_load(db, dataset_name):
+    # Bump the data version so cached dashboards for this collection are recomputed; the
+    # progress record goes last, so a crash in between only means one extra bump on rerun
+    bump_dataset_version(db, dataset_name)
+    db[PROGRESS_COLLECTION].delete_one({"_id": dataset_name})
+
+
+def load_file(db, filepath, chunk_size, restart=False):
+    dataset_name = dataset_name_for(os.path.basename(filepath))
+    staging_name = dataset_name + STAGING_SUFFIX
+    staging = db[staging_name]
+    progress = db[PROGRESS_COLLECTION]
+    fingerprint = file_fingerprint(filepath)
+
+    # Resume only a load of this exact file; anything else starts from an empty staging collection
+    state = progress.find_one({"_id": dataset_name})
+    if restart or not state or state.get("file") != fingerprint:
+        staging.drop()
+        state = {"_id": dataset_name, "file": fingerprint, "chunksDone": 0, "rows": 0}
+        progress.replace_one({"_id": dataset_name}, state, upsert=True)
+    elif state.get("complete") and not collection_exists(db, staging_name):
+        # The previous run renamed staging into place and stopped before cleaning up
+        print(f"↪️  '{dataset_name}' was already swapped in; finishing up")
+        finish_load(db, dataset_name)
+        return dataset_name, state["rows"]
+    elif state["chunksDone"]:
+        print(f"↪️  Resuming '{dataset_name}' after {state['chunksDone']} chunks")
+
+    rows = state["rows"]
+    if not state.get("complete"):
+        for number, chunk in enumerate(pd.read_csv(filepath, chunksize=chunk_size)):
+            if number < state["chunksDone"]:
+                continue
+            if 'Nacionality' in chunk.columns:
+                chunk = chunk.rename(columns={'Nacionality': 'Nationality'})
+
+            # The CSV row number is the _id, so re-inserting a half-written chunk is harmless
+            records = chunk.to_dict('records')
+            for row_number, record in zip(chunk.index, records):
+                record["_id"] = int(row_number)
+            insert_chunk(staging, records)
+
+            rows += len(records)
+            progress.update_one({"_id": dataset_name}, {"$set": {"chunksDone": number + 1, "rows": rows}})
+
+    if not rows:
+        # A header-only file must not replace the live collection with an empty one
+        staging.drop()
+        progress.delete_one({"_id": dataset_name})
+        raise ValueError(f"no rows to load; '{dataset_name}' was left as it was")
+
+    # Readers see the old collection until this single rename replaces it
+    progress.update_one({"_id": dataset_name}, {"$set": {"complete": True}})
+    staging.rename(dataset_name, dropTarget=True)
+    finish_load(db, dataset_name)
+    return dataset_name, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load every CSV in a folder into its own collection")
+    parser.add_argument("--folder", default=os.getenv("DATASET_FOLDER", DEFAULT_DATASET_FOLDER))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Files loaded in parallel")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and reload from scratch")
+    args = parser.parse_args()
+
+    db = get_db()
+
+    filepaths = [
+        os.path.join(args.folder, filename)
+        for filename in sorted(os.listdir(args.folder)) if filename.endswith('.csv')
+    ]
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(load_file, db, path, args.chunk_size, args.restart): path for path in filepaths}
+        for future in as_completed(futures):
+            filename = os.path.basename(futures[future])
+            try:
+                dataset_name, rows = future.result()
+                print(f"✅ Inserted {filename} into '{dataset_name}' ({rows} rows)")
+            except Exception as e:
+                failed += 1
+                print(f"❌ Failed to load {filename}: {e} (rerun to resume)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
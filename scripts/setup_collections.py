@@ -1,7 +1,7 @@
-from pymongo import MongoClient
+from setup_indexes import create_indexes
+from mongo_client import get_db
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["anvesha"]
+db = get_db()
 
 def create_students_collection():
     db.create_collection("students", validator={
@@ -124,3 +124,4 @@ def setup_all():
 
 if __name__ == "__main__":
     setup_all()
+    create_indexes(db)
@@ -0,0 +1,123 @@
+import argparse
+import os
+import sys
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from mongo_client import get_db  # noqa: E402
+
+# Every index the API relies on. Names are fixed so reruns recognise existing indexes.
+INDEX_SPECS = {
+    "students": [
+        # /api/login and /api/register look students up by email; register assumes one per email
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "unique": True},
+    ],
+    "profiles": [
+        {"name": "studentId_unique", "keys": [("studentId", ASCENDING)], "unique": True},
+    ],
+    "performance_analytics": [
+        {"name": "studentId_unique", "keys": [("studentId", ASCENDING)], "unique": True},
+    ],
+    "course_activity_logs": [
+        # Also serves the studentId-only queries through its prefix
+        {"name": "studentId_courseId_unique", "keys": [("studentId", ASCENDING), ("courseId", ASCENDING)], "unique": True},
+    ],
+    "course_activity_buckets": [
+        # One bucket per student, course and month; also serves the per-student month range reads
+        {"name": "studentId_courseId_month_unique", "keys": [("studentId", ASCENDING), ("courseId", ASCENDING), ("month", ASCENDING)], "unique": True},
+        {"name": "studentId_month", "keys": [("studentId", ASCENDING), ("month", ASCENDING)]},
+    ],
+    "courses": [
+        {"name": "course_id", "keys": [("course_id", ASCENDING)]},
+        {"name": "discipline", "keys": [("discipline", ASCENDING)]},
+        {"name": "origin", "keys": [("origin", ASCENDING)]},
+        {"name": "level", "keys": [("level", ASCENDING)]},
+    ],
+    "reports": [
+        # Latest report per dataset: equality on dataset, newest generated_on first
+        {"name": "dataset_generated_on", "keys": [("dataset", ASCENDING), ("generated_on", DESCENDING)]},
+    ],
+}
+
+
+def _key_tuple(keys):
+    return tuple((field, direction) for field, direction in keys)
+
+
+def existing_indexes(collection):
+    # {key tuple: index info} for every index except _id
+    indexes = {}
+    for name, info in collection.index_information().items():
+        if name == "_id_":
+            continue
+        indexes[_key_tuple(info["key"])] = dict(info, name=name)
+    return indexes
+
+
+def find_missing(db):
+    missing = []
+    collection_names = set(db.list_collection_names())
+    for collection_name, specs in INDEX_SPECS.items():
+        existing = existing_indexes(db[collection_name]) if collection_name in collection_names else {}
+        for spec in specs:
+            info = existing.get(_key_tuple(spec["keys"]))
+            if info is None or bool(info.get("unique")) != spec.get("unique", False):
+                missing.append((collection_name, spec))
+    return missing
+
+
+def create_indexes(db):
+    created, failed = 0, 0
+    for collection_name, spec in find_missing(db):
+        try:
+            db[collection_name].create_index(spec["keys"], name=spec["name"], unique=spec.get("unique", False))
+            print(f"✅ Created index '{spec['name']}' on '{collection_name}'")
+            created += 1
+        except OperationFailure as e:
+            # Usually duplicate data under a unique index, or the same keys with other options
+            print(f"[❌] Could not create '{spec['name']}' on '{collection_name}': {e.details.get('errmsg', e)}")
+            failed += 1
+    return created, failed
+
+
+def report_unused(db):
+    # $indexStats counts accesses since the server last started
+    for collection_name in INDEX_SPECS:
+        if collection_name not in db.list_collection_names():
+            continue
+        for stats in db[collection_name].aggregate([{"$indexStats": {}}]):
+            if stats["name"] == "_id_":
+                continue
+            ops = stats["accesses"]["ops"]
+            since = stats["accesses"]["since"]
+            if ops == 0:
+                print(f"[⚠️] Unused index '{stats['name']}' on '{collection_name}' (no accesses since {since})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and audit the indexes used by the API")
+    parser.add_argument("--mongo-uri", default=os.getenv("MongoURI", "mongodb://localhost:27017/"))
+    parser.add_argument("--check", action="store_true", help="Only report missing and unused indexes")
+    args = parser.parse_args()
+
+    db = get_db(uri=args.mongo_uri)
+
+    if args.check:
+        missing = find_missing(db)
+        for collection_name, spec in missing:
+            print(f"[❌] Missing index '{spec['name']}' on '{collection_name}': {spec['keys']}")
+        if not missing:
+            print("✅ All indexes present")
+    else:
+        created, failed = create_indexes(db)
+        print(f"✅ {created} indexes created, {failed} failed")
+
+    report_unused(db)
+
+
+if __name__ == "__main__":
+    main()